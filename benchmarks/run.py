@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+from langchain_core.messages import AIMessage
+from config.settings import FLEET_SIZES
+from src.agents import get_fleet
+from src.environment import DisasterEnvironment
+from src.instrumentation import tracer
+from src.knowledge_base import KnowledgeBase
+from src.mock_llm import MockLLM
+from src.simulation import run_disaster_simulation
+from ui.chat_ui import draw_flowchart
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+REGRESSION_THRESHOLD = 1.25  # Best time slower than baseline by this factor is reported as a regression
+
+def env_case(size, steps):
+    def run():
+        env = DisasterEnvironment(size=size, seed=0, disaster_type="wildfire")
+        for _ in range(steps):
+            env.update_environment()
+            env.get_report()
+    return run
+
+def simulation_case(steps, parallel, fleet_size=None):
+    llm = MockLLM(latency=0, jitter=0, seed=0)
+    fleet_sizes = {role: fleet_size for role in FLEET_SIZES} if fleet_size else None
+
+    def run():
+        run_disaster_simulation(steps=steps, chat_log=[], flowchart=[], parallel=parallel, stream=False, llm=llm, seed=0,
+                                disaster_type="flood", step_delay=0, retrieval=False, fleet_sizes=fleet_sizes)
+    return run
+
+def perform_task_case(history):
+    agent = get_fleet(llm=MockLLM(latency=0, jitter=0, seed=0), retrieval=False).members("rescue")[0]
+    for i in range(history):
+        agent.memory.append(AIMessage(content=f"From Controller: move rescue team {i} to sector {i % 7} and report the number of victims found."))
+    task = "Your task is to understand which victims need to be rescued. Rescue at (12, 40). Route: 14 cells via (12, 26), about 28 minutes"
+
+    def run():
+        # Keep the agent from draining its battery across iterations
+        agent.battery, agent.status = 100, "active"
+        agent.perform_task(task)
+    return run
+
+def flowchart_case(length, incremental):
+    flowchart = [(f"Agent-{i % 9}", "Controller", f"Deliver to ({i % 101}, {i * 7 % 101})", i % 3 == 0) for i in range(length)]
+    cache = []
+    draw_flowchart(flowchart[:-1], cache=cache)
+
+    def run():
+        if incremental:
+            # Only the newest box is rendered; the rest comes from the cache
+            del cache[length - 1:]
+            draw_flowchart(flowchart, cache=cache)
+        else:
+            draw_flowchart(flowchart)
+    return run
+
+def knowledge_base_case(batch):
+    directory = tempfile.TemporaryDirectory()  # Removed when the benchmark process exits
+    knowledge_base = KnowledgeBase(os.path.join(directory.name, "knowledge_base.sqlite"), legacy_csv=None)
+    run_row = {"timestamp": "2025-01-01T00:00:00", "disaster_type": "flood", "affected_areas": 8, "grid_size": 101, "steps": 3,
+               "rescued": 3, "supplied": 2, "open_victims": 4, "failures": 1, "depleted": 0, "tasks": 21, "status": "ok"}
+    responses = [(step, f"Agent-{i}", "Proceeding with the assigned operation while monitoring hazards. " * 10)
+                 for step in range(1, 4) for i in range(7)]
+
+    def run():
+        if batch:
+            knowledge_base.record_runs([run_row] * batch)
+        else:
+            knowledge_base.record_run(run_row, responses)
+    run.directory = directory
+    return run
+
+def build_cases():
+    """(name, factory, args) per benchmark; names encode the parameters so results compare across runs."""
+    cases = []
+    for size in (101, 500, 1000):
+        for steps in (1, 10):
+            cases.append((f"env.update_report[size={size},steps={steps}]", env_case, (size, steps)))
+    for steps in (1, 5):
+        cases.append((f"simulation[steps={steps},sequential]", simulation_case, (steps, False)))
+    cases.append(("simulation[steps=5,parallel]", simulation_case, (5, True)))
+    for fleet_size in (10, 50):
+        cases.append((f"simulation[steps=5,sequential,fleet={fleet_size}]", simulation_case, (5, False, fleet_size)))
+    for history in (0, 20):
+        cases.append((f"agent.perform_task[history={history}]", perform_task_case, (history,)))
+    for length in (100, 1000, 5000):
+        cases.append((f"draw_flowchart[length={length},cold]", flowchart_case, (length, False)))
+        cases.append((f"draw_flowchart[length={length},incremental]", flowchart_case, (length, True)))
+    cases.append(("knowledge_base.record_run[responses=21]", knowledge_base_case, (0,)))
+    cases.append(("knowledge_base.record_runs[runs=100]", knowledge_base_case, (100,)))
+    return cases
+
+def measure(fn, repeat):
+    """Seconds per call: timeit's autorange picks a loop count of at least 0.2 s, then the repeats are compared."""
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    timings = [elapsed / loops for elapsed in timer.repeat(repeat=repeat, number=loops)]
+    return {"median": statistics.median(timings), "min": min(timings), "loops": loops}
+
+def run_case(factory, args, repeat):
+    tracer.export_path = None  # Thousands of benchmark missions would otherwise flood the trace file
+    return measure(factory(*args), repeat)
+
+def run_benchmarks(name_filter=None, repeat=5):
+    """Run each benchmark in a fresh process, one at a time, so earlier cases' heap and caches don't skew later ones."""
+    results = {}
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        for name, factory, args in build_cases():
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = executor.submit(run_case, factory, args, repeat).result()
+            print(f"{name:<48}{format_seconds(results[name]['median']):>12}")
+    return results
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Print current best times against the baseline and return the names that regressed.
+    The minimum over repeats is compared because noise from other processes only ever adds time."""
+    regressions = []
+    print(f"\n{'benchmark':<48}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<48}{'-':>12}{format_seconds(result['min']):>12}{'new':>8}")
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 / threshold:
+            flag = "  faster"
+        print(f"{name:<48}{format_seconds(baseline[name]['min']):>12}{format_seconds(result['min']):>12}{ratio:>7.2f}x{flag}")
+    return regressions
+
+def environment_info():
+    return {"timestamp": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the simulation, environment and UI hot paths.")
+    parser.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--output", default="data/benchmark_results.json")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 if any benchmark regressed")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.filter, args.repeat)
+    report = {"environment": environment_info(), "results": results}
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            # A filtered run only replaces the benchmarks it measured
+            with open(args.baseline, encoding="utf-8") as f:
+                previous = json.load(f)["results"]
+            report["results"] = {**previous, **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"Baseline from {baseline['environment']['timestamp']} (Python {baseline['environment']['python']}, {baseline['environment']['cpus']} CPUs)")
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.2f}x: {', '.join(regressions)}")
+        if args.strict:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,3 +1,93 @@
 SIMULATION_STEPS = 3
-DELAY_BETWEEN_CALLS = 20  # Seconds
-DELAY_BETWEEN_STEPS = 10  # Seconds
\ No newline at end of file
+DELAY_BETWEEN_CALLS = 0  # Seconds; optional floor between LLM calls on top of the rate limits
+DELAY_BETWEEN_STEPS = 10  # Seconds
+PARALLEL_AGENTS = True  # Fan out independent agents after the Controller plan
+MAX_PARALLEL_AGENTS = 6  # Worker threads per simulation step
+REQUESTS_PER_MINUTE = 30  # Groq quota for the account, shared by every agent
+TOKENS_PER_MINUTE = 6000  # Prompt + completion tokens per minute
+RATE_LIMIT_RETRIES = 3  # Retries after a 429 before giving up
+AGENT_PRIORITIES = {  # Lower runs first when calls are queued on the rate limiter
+    "central coordinator": 0,
+    "on-site rescue": 0,
+    "medical support": 1,
+    "supply delivery": 1,
+    "road coordinator": 1,
+    "aerial drone": 1,
+    "damage assessor": 2,
+}
+STREAM_RESPONSES = True  # Stream agent replies into the chat log token by token
+LLM_CACHE_ENABLED = True  # Serve repeated prompts from the on-disk response cache
+LLM_CACHE_PATH = "data/llm_cache.sqlite"
+LLM_CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached response expires
+LLM_CACHE_MAX_ENTRIES = 10000  # Least recently used responses are evicted past this
+LLM_BACKEND = "groq"  # "groq" or "mock"; the LLM_BACKEND environment variable overrides this
+AGENT_LLM_BACKENDS = {}  # Per-agent overrides by name, e.g. {"Assess-1": "mock"}
+MOCK_LLM_LATENCY = 0.5  # Seconds per mock completion
+MOCK_LLM_JITTER = 0.1  # +/- seconds of random variation on the mock latency
+MOCK_LLM_RESPONSE_TOKENS = 200  # Words per templated mock reply
+GRID_SIZE = 101  # Map cells per side; coordinates run 0..GRID_SIZE-1
+MAX_DELTA_CELLS_IN_PROMPT = 20  # Cells or clusters listed per change type before the rest are counted
+MEMORY_MAX_MESSAGES = 20  # Turns kept verbatim per agent; older ones are folded into the summary
+MEMORY_TOKEN_BUDGET = 1200  # Prompt tokens spent on memory per call, summary included
+MEMORY_SUMMARY_TOKENS = 200  # Cap on the rolling summary of evicted turns
+SPATIAL_BUCKET_SIZE = 8  # Cells per side of a spatial index bucket
+ROUTE_CACHE_SIZE = 512  # Recent A* paths kept by the route planner
+ROUTE_MINUTES_PER_CELL = 2  # Ground travel time per grid cell, for ETAs
+ROUTE_MAX_WAYPOINTS = 8  # Turning points listed in a route briefing
+UI_REFRESH_SECONDS = 1  # Live panel refresh interval while a mission runs
+CHAT_PAGE_SIZE = 50  # Chat log entries rendered per page
+FLOWCHART_WINDOW = 200  # Most recent actions drawn in the mission flowchart
+EVENT_QUEUE_SIZE = 5000  # Events buffered per UI session before tokens, then the oldest events, are dropped
+EVENT_SUBSCRIBER_TIMEOUT = 60  # Seconds a session's full queue may go unread before its subscription is removed
+UI_MAX_EVENTS_PER_REFRESH = 2000  # Events applied per UI refresh
+KNOWLEDGE_BASE_PATH = "data/knowledge_base.sqlite"  # Past missions, metrics and agent responses
+LEGACY_KNOWLEDGE_BASE_CSV = "disaster_knowledge_base.csv"  # Imported once into a new knowledge base
+RETRIEVAL_ENABLED = True  # Ground agent prompts in similar responses from past missions
+RETRIEVAL_INDEX_DIR = "data/retrieval_index"
+RETRIEVAL_FEATURES = 2 ** 18  # Hashed n-gram features before projection
+RETRIEVAL_DIMENSIONS = 256  # Stored embedding size per response
+RETRIEVAL_TOP_K = 3  # Past responses injected per prompt
+RETRIEVAL_MIN_SCORE = 0.2  # Cosine similarity below which a past response is ignored
+RETRIEVAL_SNIPPET_CHARS = 400  # Characters quoted from each retrieved response
+AGENT_MAX_TOKENS = 1024  # Completion budget per agent call
+GROUNDED_MAX_TOKENS = 768  # Completion budget when past missions were retrieved into the prompt
+TRACE_MAX_SPANS = 20000  # Finished spans kept in memory for summaries
+TRACE_EXPORT_PATH = "data/traces.jsonl"  # Each mission's spans are appended here; None disables the export
+LLM_PRICES_PER_MILLION = {  # USD per million (prompt, completion) tokens
+    "deepseek-r1-distill-llama-70b": (0.75, 0.99),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+}
+LLM_MODEL = "deepseek-r1-distill-llama-70b"
+LLM_FALLBACK_MODEL = "llama-3.1-8b-instant"  # Used while the primary model's circuit breaker is open; None disables
+LLM_CONNECT_TIMEOUT = 5  # Seconds to open a connection to the API
+LLM_READ_TIMEOUT = 60  # Seconds to wait for response bytes (between stream chunks when streaming)
+LLM_MAX_CONNECTIONS = 20
+LLM_KEEPALIVE_CONNECTIONS = 10  # Idle connections kept warm in the shared pool
+LLM_KEEPALIVE_EXPIRY = 30  # Seconds an idle connection is kept
+LLM_TRANSIENT_RETRIES = 2  # Retries on connection errors, timeouts and 5xx responses
+LLM_RETRY_BASE_DELAY = 0.5  # Backoff before the first retry, doubled per attempt with full jitter
+LLM_RETRY_MAX_DELAY = 8
+LLM_SLOW_CALL_SECONDS = 45  # Successful calls slower than this count as failures for the circuit breaker
+CIRCUIT_FAILURE_THRESHOLD = 3  # Consecutive failures before a model's circuit opens
+CIRCUIT_RESET_SECONDS = 60  # Seconds an open circuit waits before letting a trial call through
+PROMPT_TOKEN_BUDGET = 2000  # Estimated prompt tokens per agent call; memory is trimmed first to fit
+AGENT_PROMPT_BUDGETS = {  # Per agent_type overrides of PROMPT_TOKEN_BUDGET
+    "central coordinator": 3000,
+}
+CHECKPOINT_DIR = "data/checkpoints"  # One subdirectory of step checkpoints per UI mission
+CHECKPOINT_COMPRESSION = 1  # zlib level; the grids are bit-packed already, so fast beats small
+AGENT_INBOX_SIZE = 50  # Unread messages kept per agent; the oldest is dropped past this
+PLAN_BROADCAST_TOKENS = 300  # Leading tokens of the Controller's plan delivered to every agent
+MESSAGE_ROUNDS_PER_STEP = 3  # Delivery rounds per step, enough for drone detection -> rescue -> treatment
+DRONE_DETECTION_RADIUS = 10  # Cells around a surveyed area in which a drone spots victims
+DRONE_SURVEYS_PER_STEP = 2  # Unsurveyed areas the Controller queues per available drone each step
+FLEET_SIZES = {  # Working agents per role; the Controller is always one
+    "routes": 1,
+    "drone": 1,
+    "assess": 1,
+    "rescue": 1,
+    "supplies": 1,
+    "medical": 1,
+}
+FLEET_STANDBY = {"drone": 1, "supplies": 1}  # Spare agents per role that step in when a working one goes down
+FLEET_BATCH_TOKENS = 1500  # Task text one LLM call may cover when several agents of a role are dispatched together
\ No newline at end of file
@@ -0,0 +1 @@
+# Lets the tests import src and config from the repository root
\ No newline at end of file
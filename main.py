@@ -1,4 +1,4 @@
 from src.simulation import run_disaster_simulation
 
 if __name__ == "__main__":
-    run_disaster_simulation(steps=3)
\ No newline at end of file
+    run_disaster_simulation()
\ No newline at end of file
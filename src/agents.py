@@ -1,74 +1,230 @@
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import AIMessage
 import random
-from src.groq_llm import GroqLLM
+from src.llm_backend import get_llm
+from src.rate_limiter import PRIORITY_NORMAL
+from src.async_runner import run_coroutine
+from src.memory import AgentMemory
+from src.messaging import Message
+from src.fleet import Fleet, STATUS_NAMES
+from src.retrieval import agent_role, get_retriever
+from src.prompts import build_messages, strip_reasoning
+from config.settings import (AGENT_PRIORITIES, AGENT_LLM_BACKENDS, AGENT_MAX_TOKENS, GROUNDED_MAX_TOKENS, RETRIEVAL_ENABLED, RETRIEVAL_SNIPPET_CHARS,
+                             PROMPT_TOKEN_BUDGET, AGENT_PROMPT_BUDGETS, FLEET_SIZES, FLEET_STANDBY)
+
+# role: (name prefix, agent_type, capabilities); agents are named "<prefix>-<n>", except the single Controller
+AGENT_ROLES = {
+    "controller": ("Controller", "central coordinator", ["task allocation", "communication"]),
+    "routes": ("Routes", "road coordinator", ["route planning", "barricades"]),
+    "drone": ("Drone", "aerial drone", ["surveillance", "victim detection"]),
+    "assess": ("Assess", "damage assessor", ["structural analysis", "hazard detection"]),
+    "rescue": ("Rescue", "on-site rescue", ["victim extraction", "first aid"]),
+    "supplies": ("Supplies", "supply delivery", ["food", "water", "medical supplies"]),
+    "medical": ("Medical", "medical support", ["treatment", "transport"]),
+}
 
 class DisasterResponseAgent:
-    def __init__(self, name, agent_type, capabilities, llm, backups=None):
+    def __init__(self, name, agent_type, capabilities, llm, retriever=None):
         self.name = name
         self.agent_type = agent_type
         self.capabilities = capabilities
         self.llm = llm
-        self.memory = []
-        self.status = "active"
-        self.location = (0, 0)
-        self.battery = 100
+        self.memory = AgentMemory()
+        self.fleet = None  # Once attached, status, battery and location live in the fleet's arrays
+        self.slot = None
+        self._status = "active"
+        self._location = (0, 0)
+        self._battery = 100
         self.data = {}
-        self.backups = backups or []
+        self.priority = AGENT_PRIORITIES.get(agent_type, PRIORITY_NORMAL)
+        self.retriever = retriever
+        self.prompt_budget = AGENT_PROMPT_BUDGETS.get(agent_type, PROMPT_TOKEN_BUDGET)
+        self.router = None  # Set by the simulation (src.messaging.MessageRouter)
+
+    def attach(self, fleet, slot):
+        fleet.battery[slot] = self._battery
+        fleet.status[slot] = STATUS_NAMES.index(self._status)
+        fleet.location[slot] = self._location
+        self.fleet, self.slot = fleet, slot
+
+    @property
+    def status(self):
+        return self._status if self.fleet is None else STATUS_NAMES[self.fleet.status[self.slot]]
+
+    @status.setter
+    def status(self, value):
+        if self.fleet is None:
+            self._status = value
+        else:
+            self.fleet.status[self.slot] = STATUS_NAMES.index(value)
+
+    @property
+    def battery(self):
+        return self._battery if self.fleet is None else int(self.fleet.battery[self.slot])
+
+    @battery.setter
+    def battery(self, value):
+        value = max(value, 0)
+        if self.fleet is None:
+            self._battery = value
+        else:
+            self.fleet.battery[self.slot] = value
+
+    @property
+    def location(self):
+        return self._location if self.fleet is None else tuple(int(v) for v in self.fleet.location[self.slot])
+
+    @location.setter
+    def location(self, value):
+        if self.fleet is None:
+            self._location = tuple(value[:2])
+        else:
+            self.fleet.location[self.slot] = value[:2]
 
     def receive_message(self, sender, message):
         self.memory.append(AIMessage(content=f"From {sender}: {message}"))
         return f"{self.name} received message from {sender}"
 
-    def send_message(self, recipient, message):
-        print(f"{self.name} -> {recipient.name}: {message}")
-        return recipient.receive_message(self.name, message)
+    def send_message(self, recipient, message, target=None, step=0):
+        """Queue a direct message in the recipient's inbox, or hand it over at once when no router is connected."""
+        if self.router is None:
+            print(f"{self.name} -> {recipient.name}: {message}")
+            return recipient.receive_message(self.name, message)
+        return self.router.send(Message(self.name, message, recipient=recipient.name, target=target, step=step))
+
+    def publish(self, topic, message, target=None, step=0):
+        return self.router.send(Message(self.name, message, topic=topic, target=target, step=step))
+
+    def read_inbox(self):
+        """Move unread messages into memory, so the next prompt sees them; returns how many were read."""
+        count = 0
+        while self.router is not None:
+            message = self.router.pop(self.name)
+            if message is None:
+                break
+            self.receive_message(message.sender, message.body)
+            count += 1
+        return count
 
-    def perform_task(self, task):
-        if self.status == "inactive":
+    def _prior_plans(self, task):
+        """What agents in the same role answered to similar tasks in past missions, as a prompt section."""
+        if self.retriever is None:
+            return None
+        hits = self.retriever.search(task, role=agent_role(self.name))
+        if not hits:
+            return None
+        lines = [f"- [{hit['disaster_type']}] {hit['agent']}: {' '.join(strip_reasoning(hit['message']).split())[:RETRIEVAL_SNIPPET_CHARS]}" for hit in hits]
+        return "Relevant plans from past missions (adapt, don't repeat):\n" + "\n".join(lines)
+
+    def _build_messages(self, task):
+        """Prompt messages within this agent's token budget, plus the completion budget; grounded prompts need fewer generated tokens."""
+        system_prompt = (f"You are {self.name}, a {self.agent_type} with capabilities: {', '.join(self.capabilities)}.\n"
+                         f"Status: {self.status}, Location: {self.location}, Battery: {self.battery}%.\n"
+                         "Provide detailed, realistic responses for disaster scenarios. "
+                         "Cells are written x,y; [x0-x1,y0-y1 n cells] is the bounding box of a cluster.")
+        prior_plans = self._prior_plans(task)
+        messages = build_messages(system_prompt, task, self.memory, self.prompt_budget, context=[prior_plans])
+        return messages, GROUNDED_MAX_TOKENS if prior_plans else AGENT_MAX_TOKENS
+
+    def _start_task(self):
+        if self.status != "active":
             return f"{self.name} is inactive, task aborted."
         self.battery -= random.randint(5, 20)
         if self.battery <= 0:
             self.status = "inactive"
             return f"{self.name} battery depleted, going inactive."
-        
-        messages = [
-            SystemMessage(content=f"""You are {self.name}, a {self.agent_type} with capabilities: {', '.join(self.capabilities)}.
-            Status: {self.status}, Location: {self.location}, Battery: {self.battery}%.
-            Provide detailed, realistic responses for disaster scenarios.""")
-        ]
-        messages.extend(self.memory[-5:])
-        messages.append(HumanMessage(content=task))
-        
-        response = self.llm(messages)
-        self.memory.append(AIMessage(content=response))
+        return None
+
+    def perform_task(self, task, on_token=None):
+        if on_token is not None:
+            return run_coroutine(self.aperform_task(task, on_token))
+        aborted = self._start_task()
+        if aborted:
+            return aborted
+
+        messages, max_tokens = self._build_messages(task)
+        response = self.llm(messages, max_tokens=max_tokens, priority=self.priority)
+        self.memory.append(AIMessage(content=strip_reasoning(response)))
+        return response
+
+    def take_reply(self, reply):
+        """Take this agent's part of a reply another agent of its role got for a batched task, as if it had made the call."""
+        aborted = self._start_task()
+        if aborted:
+            return aborted
+        self.memory.append(AIMessage(content=strip_reasoning(reply)))
+        return reply
+
+    async def aperform_task(self, task, on_token=None):
+        """Stream the response, passing each text chunk to on_token as it arrives."""
+        aborted = self._start_task()
+        if aborted:
+            if on_token is not None:
+                on_token(aborted)
+            return aborted
+
+        messages, max_tokens = self._build_messages(task)
+        chunks = []
+        async for token in self.llm.astream(messages, max_tokens=max_tokens, priority=self.priority):
+            chunks.append(token)
+            if on_token is not None:
+                on_token(token)
+        response = "".join(chunks)
+        self.memory.append(AIMessage(content=strip_reasoning(response)))
         return response
 
     def update_location(self, new_location):
         self.location = new_location
         return f"{self.name} moved to {new_location}"
 
-    def activate_backup(self):
-        if self.backups and self.status == "inactive":
-            backup = self.backups.pop(0)
-            backup.status = "active"
-            print(f"{self.name} activating backup: {backup.name}")
-            return backup
-        return None
+    def snapshot(self):
+        """Plain-data copy of the agent and its memory; status, battery and location are saved with the fleet (see src.checkpoint)."""
+        return {"name": self.name, "agent_type": self.agent_type, "capabilities": list(self.capabilities), "data": dict(self.data),
+                "memory": self.memory.snapshot()}
+
+    @classmethod
+    def from_snapshot(cls, state, llm_for, retriever=None):
+        agent = cls(state["name"], state["agent_type"], state["capabilities"], llm_for(state["name"]), retriever=retriever)
+        agent.data = dict(state["data"])
+        agent.memory.restore(state["memory"])
+        return agent
 
     def report_status(self):
         return f"{self.name} (Type: {self.agent_type}) - Status: {self.status}, Location: {self.location}, Battery: {self.battery}%"
 
-# Define agents lazily inside a function
-def get_agents():
-    llm = GroqLLM()
-    return {
-        "controller": DisasterResponseAgent("Controller", "central coordinator", ["task allocation", "communication"], llm),
-        "rescue": DisasterResponseAgent("Rescue-1", "on-site rescue", ["victim extraction", "first aid"], llm),
-        "drone": DisasterResponseAgent("Drone-1", "aerial drone", ["surveillance", "victim detection"], llm, 
-                                       backups=[DisasterResponseAgent("Drone-2", "aerial drone", ["surveillance", "victim detection"], llm)]),
-        "medical": DisasterResponseAgent("Medical-1", "medical support", ["treatment", "transport"], llm),
-        "assess": DisasterResponseAgent("Assess-1", "damage assessor", ["structural analysis", "hazard detection"], llm),
-        "supplies": DisasterResponseAgent("Supplies-1", "supply delivery", ["food", "water", "medical supplies"], llm, 
-                                          backups=[DisasterResponseAgent("Supplies-2", "supply delivery", ["food", "water", "medical supplies"], llm)]),
-        "routes": DisasterResponseAgent("Routes-1", "road coordinator", ["route planning", "barricades"], llm)
-    }
\ No newline at end of file
+# LLMs and the retriever are resolved per call, so each fleet picks up the current backend settings
+def _fleet_options(llm=None, backend=None, backends=None, retrieval=None):
+    """(llm_for, retriever) shared by get_fleet and restore_fleet."""
+    llm = llm or get_llm(backend)
+    if retrieval is None:
+        retrieval = RETRIEVAL_ENABLED
+    retriever = get_retriever() if retrieval is True else retrieval or None
+    backends = AGENT_LLM_BACKENDS if backends is None else backends
+    override_llms = {name: get_llm(name) for name in set(backends.values())}
+
+    def llm_for(agent_name):
+        return override_llms[backends[agent_name]] if agent_name in backends else llm
+
+    return llm_for, retriever
+
+def get_fleet(sizes=None, standby=None, llm=None, backend=None, backends=None, retrieval=None):
+    """Build the agent fleet: one Controller plus sizes[role] working agents and standby[role] spares per role
+    (FLEET_SIZES and FLEET_STANDBY by default). backend picks the shared LLM; backends overrides it per agent name.
+    retrieval grounds prompts in past missions: True for the shared index, False for none, or a MissionRetriever."""
+    sizes = {**FLEET_SIZES, **(sizes or {})}
+    standby = FLEET_STANDBY if standby is None else standby
+    llm_for, retriever = _fleet_options(llm, backend, backends, retrieval)
+    agents, roles, spares = [], [], []
+    for role, (prefix, agent_type, capabilities) in AGENT_ROLES.items():
+        count = 1 if role == "controller" else sizes.get(role, 1) + standby.get(role, 0)
+        for number in range(1, count + 1):
+            name = prefix if role == "controller" else f"{prefix}-{number}"
+            if role != "controller" and number > sizes.get(role, 1):
+                spares.append(len(agents))
+            agents.append(DisasterResponseAgent(name, agent_type, list(capabilities), llm_for(name), retriever=retriever))
+            roles.append(role)
+    return Fleet(agents, roles, standby=spares)
+
+def restore_fleet(snapshot, llm=None, backend=None, backends=None, retrieval=None):
+    """Rebuild a fleet from Fleet.snapshot(), wiring in LLMs the same way get_fleet does."""
+    llm_for, retriever = _fleet_options(llm, backend, backends, retrieval)
+    return Fleet.from_snapshot(snapshot, [DisasterResponseAgent.from_snapshot(state, llm_for, retriever) for state in snapshot["agents"]])
\ No newline at end of file
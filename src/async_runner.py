@@ -0,0 +1,25 @@
+import asyncio
+import contextvars
+import threading
+
+# One long-lived event loop for async LLM clients, so their connection pools stay bound to a single loop
+_loop = None
+_loop_lock = threading.Lock()
+
+def get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+        return _loop
+
+async def _in_context(coro, context):
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+def run_coroutine(coro):
+    """Run a coroutine on the shared loop and block the calling thread until it finishes.
+    The caller's context variables (e.g. the current trace span) are visible inside the coroutine."""
+    return asyncio.run_coroutine_threadsafe(_in_context(coro, contextvars.copy_context()), get_loop()).result()
\ No newline at end of file
@@ -0,0 +1,138 @@
+import argparse
+import csv
+import itertools
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from config.settings import SIMULATION_STEPS, GRID_SIZE, FLEET_SIZES
+from src.checkpoint import load_checkpoint, fork_state
+from src.environment import DISASTER_TYPES
+from src.knowledge_base import get_knowledge_base
+from src.llm_backend import get_llm
+from src.rate_limiter import configure_rate_limiter
+from src.simulation import run_disaster_simulation
+
+RESULT_FIELDS = ["seed", "disaster_type", "grid_size", "steps", "fleet_size", "backend", "status", "error", "affected", "rescued", "supplied",
+                 "open_victims", "failures", "depleted", "tasks", "task_errors", "idle", "messages", "mean_step_latency", "max_step_latency", "duration"]
+
+def make_scenarios(runs, seed=0, disaster_types=DISASTER_TYPES, grid_sizes=(GRID_SIZE,), steps=SIMULATION_STEPS, backend="mock", llm_options=None,
+                   fleet_size=None):
+    """Seeded scenarios cycling through every disaster type / grid size combination.
+
+    llm_options are passed to the backend constructor, e.g. {"latency": 0} for an instant mock.
+    fleet_size sets how many agents work in each role (FLEET_SIZES by default).
+    """
+    combos = itertools.cycle(itertools.product(disaster_types, grid_sizes))
+    return [{"seed": seed + i, "disaster_type": disaster_type, "grid_size": grid_size, "steps": steps, "fleet_size": fleet_size, "backend": backend,
+             "llm_options": llm_options or {}} for i, (disaster_type, grid_size) in zip(range(runs), combos)]
+
+def make_branches(checkpoint, branches, seed=0, backend="mock", llm_options=None):
+    """What-if scenarios that all resume from one checkpoint, each with its own seed for the remaining steps."""
+    state = load_checkpoint(checkpoint)
+    return [{"seed": seed + i, "checkpoint": checkpoint, "disaster_type": state["env"]["disaster_type"], "grid_size": state["env"]["size"],
+             "steps": state["steps"], "backend": backend, "llm_options": llm_options or {}} for i in range(branches)]
+
+def run_scenario(scenario):
+    """Run one scenario in the current process and flatten its stats into a result row."""
+    row = {field: "" for field in RESULT_FIELDS}
+    row.update({key: value for key, value in scenario.items() if key in RESULT_FIELDS and value is not None})
+    stats = {}
+    start = time.perf_counter()
+    try:
+        llm = get_llm(scenario["backend"], **scenario.get("llm_options", {}))
+        # Sequential agents and no retrieval keep a seeded run reproducible; the process pool provides the parallelism
+        resume_from = fork_state(load_checkpoint(scenario["checkpoint"]), scenario["seed"]) if scenario.get("checkpoint") else None
+        fleet_sizes = {role: scenario["fleet_size"] for role in FLEET_SIZES} if scenario.get("fleet_size") else None
+        run_disaster_simulation(steps=scenario["steps"], chat_log=[], flowchart=[], parallel=False, stream=False, llm=llm,
+                                seed=scenario["seed"], disaster_type=scenario["disaster_type"], grid_size=scenario["grid_size"], step_delay=0, stats=stats,
+                                retrieval=False, resume_from=resume_from, fleet_sizes=fleet_sizes)
+        row["status"] = "ok"
+    except Exception as e:
+        row["status"] = "error"
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["duration"] = time.perf_counter() - start
+    latencies = stats.get("step_latency") or [0.0]
+    row["mean_step_latency"] = statistics.fmean(latencies)
+    row["max_step_latency"] = max(latencies)
+    for field in ("affected", "rescued", "supplied", "open_victims", "failures", "depleted", "tasks", "task_errors", "idle", "messages"):
+        row[field] = stats.get(field, 0)
+    return row
+
+def run_batch(scenarios, workers=None):
+    """Run scenarios across a process pool. Each worker process has its own LLM cache connection and a rate limiter
+    allowed 1/workers of the account quota, so the pool as a whole stays within REQUESTS_PER_MINUTE and TOKENS_PER_MINUTE."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [run_scenario(scenario) for scenario in scenarios]
+    with ProcessPoolExecutor(max_workers=workers, initializer=configure_rate_limiter, initargs=(1 / workers,)) as executor:
+        return list(executor.map(run_scenario, scenarios, chunksize=max(1, len(scenarios) // (workers * 4))))
+
+def summarize(rows):
+    """Aggregate result rows per disaster type and grid size."""
+    groups = {}
+    for row in rows:
+        groups.setdefault((row["disaster_type"], row["grid_size"]), []).append(row)
+    summary = []
+    for (disaster_type, grid_size), group in sorted(groups.items()):
+        ok = [row for row in group if row["status"] == "ok"]
+        summary.append({
+            "disaster_type": disaster_type,
+            "grid_size": grid_size,
+            "runs": len(group),
+            "errors": len(group) - len(ok),
+            "mean_rescued": statistics.fmean(row["rescued"] for row in ok) if ok else 0.0,
+            "mean_supplied": statistics.fmean(row["supplied"] for row in ok) if ok else 0.0,
+            "mean_failures": statistics.fmean(row["failures"] + row["depleted"] for row in ok) if ok else 0.0,
+            "mean_step_latency": statistics.fmean(row["mean_step_latency"] for row in ok) if ok else 0.0,
+            "p95_step_latency": _percentile([row["max_step_latency"] for row in ok], 0.95),
+        })
+    return summary
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def write_results(rows, path):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run seeded disaster scenarios in parallel and aggregate the outcomes.")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--steps", type=int, default=SIMULATION_STEPS)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[GRID_SIZE])
+    parser.add_argument("--types", nargs="+", default=list(DISASTER_TYPES), choices=DISASTER_TYPES)
+    parser.add_argument("--backend", default="mock")
+    parser.add_argument("--mock-latency", type=float, default=None, help="Seconds per call for the mock backend")
+    parser.add_argument("--output", default="data/batch_results.csv")
+    parser.add_argument("--no-knowledge-base", action="store_true", help="Skip recording the runs in the knowledge base")
+    parser.add_argument("--fleet-size", type=int, default=None, help="Agents working in each role (default: FLEET_SIZES)")
+    parser.add_argument("--resume", default=None, metavar="CHECKPOINT", help="Branch --runs seeded what-if runs off this mission checkpoint")
+    args = parser.parse_args()
+
+    llm_options = {"latency": args.mock_latency, "jitter": 0} if args.backend == "mock" and args.mock_latency is not None else {}
+    if args.resume:
+        scenarios = make_branches(args.resume, args.runs, seed=args.seed, backend=args.backend, llm_options=llm_options)
+    else:
+        scenarios = make_scenarios(args.runs, seed=args.seed, disaster_types=args.types, grid_sizes=args.sizes, steps=args.steps,
+                                   backend=args.backend, llm_options=llm_options, fleet_size=args.fleet_size)
+    start = time.perf_counter()
+    rows = run_batch(scenarios, workers=args.workers)
+    write_results(rows, args.output)
+    if not args.no_knowledge_base:
+        get_knowledge_base().record_runs(rows, source="batch")
+    print(f"{len(rows)} runs in {time.perf_counter() - start:.1f}s -> {args.output}")
+    for entry in summarize(rows):
+        print(" | ".join(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}" for key, value in entry.items()))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
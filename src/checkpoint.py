@@ -0,0 +1,163 @@
+import glob
+import json
+import os
+import pickle
+import random
+import struct
+import zlib
+from contextlib import contextmanager
+import numpy as np
+from config.settings import CHECKPOINT_DIR, CHECKPOINT_COMPRESSION
+
+MAGIC = b"DRCKPT"
+FORMAT_VERSION = 4
+_HEADER = struct.Struct(f"<{len(MAGIC)}sH")
+MANIFEST_NAME = "manifest.json"  # Latest checkpoint of a mission and its progress, so listings never unpickle checkpoints
+LOCK_NAME = "mission.lock"  # Pid of the process running the mission
+
+class CheckpointError(ValueError):
+    """The file is not a checkpoint, or was written by an incompatible version."""
+
+def mission_state(step, steps, env, planner, fleet, router, stats, chat_log, agent_status, flowchart):
+    """Everything run_disaster_simulation needs to carry on after step, as plain data."""
+    return {
+        "step": step,
+        "steps": steps,
+        "env": env.snapshot(),
+        "routes": planner.snapshot(),
+        "fleet": fleet.snapshot(),
+        "router": router.snapshot(),
+        "random": random.getstate(),
+        "stats": {key: list(value) if isinstance(value, list) else value for key, value in stats.items()},
+        "chat_log": [dict(entry) for entry in chat_log],
+        "agent_status": {name: dict(status) for name, status in agent_status.items()},
+        "flowchart": list(flowchart),
+    }
+
+def save_checkpoint(state, path):
+    """Write state as a small versioned header followed by a zlib-compressed pickle, and update the directory's manifest.
+
+    The file is written next to path and renamed into place, so a crash never leaves a torn checkpoint.
+    """
+    payload = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), CHECKPOINT_COMPRESSION)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION))
+        f.write(payload)
+    os.replace(tmp_path, path)
+    write_manifest(path, state)
+    return path
+
+def write_manifest(path, state):
+    """Point the mission directory's manifest at the checkpoint just written to path."""
+    manifest = {"checkpoint": os.path.basename(path), "step": state["step"], "steps": state["steps"], "disaster_type": state["env"]["disaster_type"]}
+    manifest_path = os.path.join(os.path.dirname(path), MANIFEST_NAME)
+    with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _pid_running(pid):
+    if pid == os.getpid():
+        return True
+    if os.name != "posix":
+        # os.kill can't probe a process on Windows; a lock left by another process is taken to be from before a restart
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def mission_running(directory):
+    """Whether a live process holds the mission's lock."""
+    try:
+        with open(os.path.join(directory, LOCK_NAME), encoding="utf-8") as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        return False
+    return _pid_running(pid)
+
+@contextmanager
+def mission_lock(directory):
+    """Hold the mission's lock while it runs, so no other session resumes it at the same time.
+    A lock left behind by a process that died is taken over."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, LOCK_NAME)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if mission_running(directory):
+                raise CheckpointError(f"Mission in {directory} is already running")
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    else:
+        raise CheckpointError(f"Could not lock mission in {directory}")
+    with os.fdopen(fd, "w") as f:
+        f.write(str(os.getpid()))
+    try:
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def load_checkpoint(path):
+    """Read a checkpoint written by save_checkpoint. Checkpoints are pickles: only load files this app wrote."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise CheckpointError(f"{path} is too short to be a checkpoint")
+    magic, version = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise CheckpointError(f"{path} is not a simulation checkpoint")
+    if version != FORMAT_VERSION:
+        raise CheckpointError(f"{path} has checkpoint format {version}; this version reads {FORMAT_VERSION}")
+    return pickle.loads(zlib.decompress(data[_HEADER.size:]))
+
+def checkpoint_path(directory, step):
+    return os.path.join(directory, f"step-{step:04d}.ckpt")
+
+def latest_checkpoint(directory):
+    """Newest step checkpoint in a mission directory, or None."""
+    paths = sorted(glob.glob(os.path.join(directory, "step-*.ckpt")))
+    return paths[-1] if paths else None
+
+def unfinished_missions(root=CHECKPOINT_DIR):
+    """(mission directory, latest checkpoint path, manifest) for missions that stopped before their last step and
+    aren't running anywhere, newest first. Reads only the manifests; load_checkpoint the path to resume."""
+    missions = []
+    for directory in glob.glob(os.path.join(root, "*")):
+        manifest = read_manifest(directory)
+        if manifest is None or manifest["step"] >= manifest["steps"] or mission_running(directory):
+            continue
+        path = os.path.join(directory, manifest["checkpoint"])
+        if os.path.exists(path):
+            missions.append((directory, path, manifest))
+    missions.sort(key=lambda mission: os.path.getmtime(mission[1]), reverse=True)
+    return missions
+
+def fork_state(state, seed):
+    """Copy of state whose future randomness comes from seed, for what-if branches off a shared prefix."""
+    branch = pickle.loads(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+    branch["env"]["rng"] = np.random.default_rng(seed).bit_generator.state
+    rng = random.Random(seed)
+    branch["random"] = rng.getstate()
+    branch["branch_seed"] = seed
+    return branch
\ No newline at end of file
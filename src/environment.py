@@ -1,52 +1,214 @@
-import random
+import numpy as np
 from datetime import datetime
+from config.settings import GRID_SIZE
+
+DISASTER_TYPES = ("earthquake", "flood", "wildfire")
+SUPPLY_TYPES = ("medical", "food", "water")  # Stored in the supply grid as index + 1; 0 means no need
+SPREAD_PROBABILITY = 0.2  # Chance a burning cell ignites each 4-neighbour per step
+
+_FLAG_GRIDS = ("affected", "blocked", "victims", "rescued", "supplied", "surveyed")
+
+def _cells(mask):
+    return [tuple(cell) for cell in np.argwhere(mask).tolist()]
 
 class DisasterEnvironment:
-    def __init__(self):
+    """Disaster map held as boolean grids indexed [x, y], so updates and reports are vectorized."""
+
+    def __init__(self, size=GRID_SIZE, seed=None, disaster_type=None):
         self.time = datetime.now()
-        self.disaster_type = random.choice(["earthquake", "flood", "wildfire"])
-        self.affected_areas = []
-        self.blocked_routes = []
-        self.victim_locations = []
-        self.supply_needs = []
-        self.completed_tasks = {"rescued": [], "supplied": []}
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.disaster_type = disaster_type or str(self.rng.choice(DISASTER_TYPES))
+        shape = (size, size)
+        self.affected = np.zeros(shape, dtype=bool)
+        self.blocked = np.zeros(shape, dtype=bool)
+        self.victims = np.zeros(shape, dtype=bool)
+        self.supplies = np.zeros(shape, dtype=np.int8)
+        self.rescued = np.zeros(shape, dtype=bool)
+        self.supplied = np.zeros(shape, dtype=bool)
+        self.surveyed = np.zeros(shape, dtype=bool)  # Cells a drone has looked at
+        self._last_seen = None
         self.initialize_environment()
 
     def initialize_environment(self):
-        for _ in range(random.randint(5, 10)):
-            x, y = random.randint(0, 100), random.randint(0, 100)
-            self.affected_areas.append((x, y))
-            if random.random() > 0.6: self.blocked_routes.append((x, y))
-            if random.random() > 0.5: self.victim_locations.append((x, y))
-            if random.random() > 0.4: self.supply_needs.append((x, y, random.choice(["medical", "food", "water"])))
+        count = self.rng.integers(5, 11)
+        xs = self.rng.integers(0, self.size, count)
+        ys = self.rng.integers(0, self.size, count)
+        self.affected[xs, ys] = True
+        blocked = self.rng.random(count) > 0.6
+        self.blocked[xs[blocked], ys[blocked]] = True
+        victims = self.rng.random(count) > 0.5
+        self.victims[xs[victims], ys[victims]] = True
+        needs = self.rng.random(count) > 0.4
+        self.supplies[xs[needs], ys[needs]] = self.rng.integers(1, len(SUPPLY_TYPES) + 1, needs.sum())
+
+    def _bounds(self, mask, margin=0):
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        if rows.size == 0:
+            return 0, 0, 0, 0
+        return (max(rows[0] - margin, 0), min(rows[-1] + margin + 1, self.size),
+                max(cols[0] - margin, 0), min(cols[-1] + margin + 1, self.size))
+
+    def _random_cell(self, mask):
+        flat = np.flatnonzero(mask)
+        if flat.size == 0:
+            return None
+        return np.unravel_index(self.rng.choice(flat), mask.shape)
 
     def update_environment(self):
         if self.disaster_type == "wildfire":
-            new_areas = []
-            for x, y in self.affected_areas:
-                for dx, dy in [(1,0), (-1,0), (0,1), (0,-1)]:
-                    new_x, new_y = x+dx, y+dy
-                    if 0 <= new_x <= 100 and 0 <= new_y <= 100 and random.random() > 0.8:
-                        new_areas.append((new_x, new_y))
-            self.affected_areas.extend(new_areas)
-            if random.random() > 0.7:
-                self.victim_locations.append(random.choice(self.affected_areas))
+            x0, x1, y0, y1 = self._bounds(self.affected, margin=1)
+            burning = self.affected[x0:x1, y0:y1]
+            spread = np.zeros_like(burning)
+            # Each burning cell ignites each in-bounds neighbour independently; only the fire's bounding box is sampled
+            spread[1:, :] |= burning[:-1, :] & (self.rng.random(spread[1:, :].shape) < SPREAD_PROBABILITY)
+            spread[:-1, :] |= burning[1:, :] & (self.rng.random(spread[:-1, :].shape) < SPREAD_PROBABILITY)
+            spread[:, 1:] |= burning[:, :-1] & (self.rng.random(spread[:, 1:].shape) < SPREAD_PROBABILITY)
+            spread[:, :-1] |= burning[:, 1:] & (self.rng.random(spread[:, :-1].shape) < SPREAD_PROBABILITY)
+            burning |= spread
+            if self.rng.random() > 0.7:
+                cell = self._random_cell(self.affected)
+                if cell is not None:
+                    self.victims[cell] = True
         elif self.disaster_type == "flood":
-            self.blocked_routes = [(x, y-1) for x, y in self.blocked_routes if 0 <= y-1 <= 100]
-            if random.random() > 0.6:
-                self.supply_needs.append((random.randint(0, 100), random.randint(0, 100), "water"))
+            # Water pushes every blockage one cell towards y = 0; blockages at the edge wash out
+            shifted = np.zeros_like(self.blocked)
+            shifted[:, :-1] = self.blocked[:, 1:]
+            self.blocked = shifted
+            if self.rng.random() > 0.6:
+                x, y = self.rng.integers(0, self.size, 2)
+                self.supplies[x, y] = SUPPLY_TYPES.index("water") + 1
+                self.supplied[x, y] = False
         elif self.disaster_type == "earthquake":
-            if random.random() > 0.5:
-                new_block = random.choice(self.affected_areas)
-                self.blocked_routes.append(new_block)
-                self.victim_locations.append(new_block)
+            if self.rng.random() > 0.5:
+                cell = self._random_cell(self.affected)
+                if cell is not None:
+                    self.blocked[cell] = True
+                    self.victims[cell] = True
         self.time = datetime.now()
 
+    def mark_rescued(self, location):
+        self.rescued[location[0], location[1]] = True
+
+    def mark_supplied(self, need):
+        self.supplied[need[0], need[1]] = True
+
+    def survey(self, location, radius):
+        """Mark the square window of radius cells around location as surveyed and return the victims awaiting rescue
+        in it, nearest first."""
+        x, y = location[0], location[1]
+        x0, y0 = max(0, x - radius), max(0, y - radius)
+        window = (slice(x0, x + radius + 1), slice(y0, y + radius + 1))
+        self.surveyed[window] = True
+        open_victims = self.victims[window] & ~self.rescued[window]
+        cells = [(cx + x0, cy + y0) for cx, cy in np.argwhere(open_victims).tolist()]
+        return sorted(cells, key=lambda cell: (abs(cell[0] - x) + abs(cell[1] - y), cell))
+
+    @property
+    def affected_areas(self):
+        return _cells(self.affected)
+
+    @property
+    def blocked_routes(self):
+        return _cells(self.blocked)
+
+    @property
+    def victim_locations(self):
+        return _cells(self.victims)
+
+    @property
+    def supply_needs(self):
+        return self._supply_cells(self.supplies > 0)
+
+    @property
+    def completed_tasks(self):
+        return {"rescued": set(_cells(self.rescued)), "supplied": set(self._supply_cells(self.supplied & (self.supplies > 0)))}
+
+    def _supply_cells(self, mask):
+        return [(x, y, SUPPLY_TYPES[self.supplies[x, y] - 1]) for x, y in _cells(mask)]
+
+    def _open_victims(self):
+        return self.victims & ~self.rescued
+
+    def _open_needs(self):
+        return (self.supplies > 0) & ~self.supplied
+
+    def get_delta(self):
+        """Cells that changed since the previous call; the first call reports the whole initial state."""
+        current = {
+            "affected": self.affected.copy(),
+            "blocked": self.blocked.copy(),
+            "victims": self._open_victims(),
+            "rescued": self.rescued.copy(),
+            "needs": self._open_needs(),
+            "supplied": self.supplied.copy(),
+        }
+        previous = self._last_seen or {name: np.zeros_like(mask) for name, mask in current.items()}
+        self._last_seen = current
+        return {
+            "newly_affected": _cells(current["affected"] & ~previous["affected"]),
+            "newly_blocked": _cells(current["blocked"] & ~previous["blocked"]),
+            "cleared_routes": _cells(previous["blocked"] & ~current["blocked"]),
+            "new_victims": _cells(current["victims"] & ~previous["victims"]),
+            "newly_rescued": _cells(current["rescued"] & ~previous["rescued"]),
+            "new_supply_needs": self._supply_cells(current["needs"] & ~previous["needs"]),
+            "newly_supplied": self._supply_cells(current["supplied"] & ~previous["supplied"] & (self.supplies > 0)),
+        }
+
+    def get_summary(self):
+        """Counts and the affected bounding box; constant size however large the disaster grows."""
+        x0, x1, y0, y1 = self._bounds(self.affected)
+        return {
+            "disaster_type": self.disaster_type,
+            "affected": int(self.affected.sum()),
+            "affected_bounds": ((int(x0), int(y0)), (int(x1) - 1, int(y1) - 1)) if x1 else None,
+            "blocked": int(self.blocked.sum()),
+            "open_victims": int(self._open_victims().sum()),
+            "rescued": int(self.rescued.sum()),
+            "open_supply_needs": int(self._open_needs().sum()),
+            "supplied": int((self.supplied & (self.supplies > 0)).sum()),
+        }
+
+    def snapshot(self):
+        """Plain-data copy of the full state, with boolean grids bit-packed (see src.checkpoint)."""
+        state = {
+            "size": self.size,
+            "disaster_type": self.disaster_type,
+            "time": self.time,
+            "rng": self.rng.bit_generator.state,
+            "supplies": self.supplies.copy(),
+            "grids": {name: np.packbits(getattr(self, name)) for name in _FLAG_GRIDS},
+            "last_seen": None,
+        }
+        if self._last_seen is not None:
+            state["last_seen"] = {name: np.packbits(mask) for name, mask in self._last_seen.items()}
+        return state
+
+    @classmethod
+    def from_snapshot(cls, state):
+        env = cls.__new__(cls)
+        size = state["size"]
+
+        def unpack(packed):
+            return np.unpackbits(packed, count=size * size).reshape(size, size).astype(bool)
+
+        env.size = size
+        env.disaster_type = state["disaster_type"]
+        env.time = state["time"]
+        env.rng = np.random.default_rng()
+        env.rng.bit_generator.state = state["rng"]
+        env.supplies = state["supplies"].copy()
+        for name, packed in state["grids"].items():
+            setattr(env, name, unpack(packed))
+        env._last_seen = {name: unpack(packed) for name, packed in state["last_seen"].items()} if state["last_seen"] is not None else None
+        return env
+
     def get_report(self):
         return {
             "disaster_type": self.disaster_type,
             "affected_areas": self.affected_areas,
             "blocked_routes": self.blocked_routes,
-            "victim_locations": [loc for loc in self.victim_locations if loc not in self.completed_tasks["rescued"]],
-            "supply_needs": [need for need in self.supply_needs if need not in self.completed_tasks["supplied"]]
+            "victim_locations": _cells(self._open_victims()),
+            "supply_needs": self._supply_cells(self._open_needs())
         }
\ No newline at end of file
@@ -0,0 +1,195 @@
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from config.settings import EVENT_QUEUE_SIZE, EVENT_SUBSCRIBER_TIMEOUT
+
+@dataclass(frozen=True)
+class SystemNotice:
+    message: str
+
+@dataclass(frozen=True)
+class AgentStarted:
+    agent: str
+    task: str
+    entry_id: Optional[int] = None  # Set when the reply will stream into its own chat entry
+
+@dataclass(frozen=True)
+class TokenReceived:
+    agent: str
+    entry_id: int
+    text: str
+
+@dataclass(frozen=True)
+class AgentFinished:
+    agent: str
+    task: str
+    message: str
+    to_agent: str = "Controller"
+    entry_id: Optional[int] = None
+
+@dataclass(frozen=True)
+class AgentFailed:
+    agent: str
+    message: str
+    entry_id: Optional[int] = None  # The streaming chat entry the failure cuts short, if any
+
+@dataclass(frozen=True)
+class BatteryChanged:
+    agent: str
+    battery: int
+
+@dataclass(frozen=True)
+class MissionDone:
+    result: str
+    disaster_type: str
+    stats: dict = field(default_factory=dict)
+    failed: bool = False
+
+_entry_ids = itertools.count(1)
+
+def next_entry_id():
+    return next(_entry_ids)
+
+def _default_status():
+    return {"active": False, "message": "", "battery": 100, "task": "", "completed": False}
+
+def _find_entry(chat_log, entry_id):
+    # Streaming entries are recent, so search from the end
+    for entry in reversed(chat_log):
+        if entry.get("id") == entry_id:
+            return entry
+    return None
+
+def apply_event(event, chat_log, agent_status, flowchart):
+    """Fold one event into the chat log, agent status and flowchart structures the UI renders."""
+    if isinstance(event, SystemNotice):
+        chat_log.append({"sender": "System", "message": event.message})
+    elif isinstance(event, AgentStarted):
+        status = agent_status.setdefault(event.agent, _default_status())
+        status["active"] = True
+        status["task"] = event.task
+        if event.entry_id is not None:
+            chat_log.append({"sender": event.agent, "message": "", "streaming": True, "id": event.entry_id})
+    elif isinstance(event, TokenReceived):
+        entry = _find_entry(chat_log, event.entry_id)
+        if entry is not None:
+            entry["message"] += event.text
+            agent_status.setdefault(event.agent, _default_status())["message"] = entry["message"]
+    elif isinstance(event, AgentFinished):
+        entry = _find_entry(chat_log, event.entry_id) if event.entry_id is not None else None
+        if entry is not None:
+            entry["message"] = event.message
+            entry["streaming"] = False
+        else:
+            chat_log.append({"sender": event.agent, "message": event.message})
+        status = agent_status.setdefault(event.agent, _default_status())
+        status["message"] = event.message
+        status["completed"] = True
+        flowchart.append((event.agent, event.to_agent, event.task, True))
+    elif isinstance(event, AgentFailed):
+        entry = _find_entry(chat_log, event.entry_id) if event.entry_id is not None else None
+        if entry is not None:
+            entry["streaming"] = False
+        chat_log.append({"sender": "System", "message": event.message})
+        status = agent_status.setdefault(event.agent, _default_status())
+        status["active"] = False
+        status["completed"] = False
+        status["message"] = event.message
+    elif isinstance(event, BatteryChanged):
+        agent_status.setdefault(event.agent, _default_status())["battery"] = event.battery
+    elif isinstance(event, MissionDone):
+        chat_log.append({"sender": "System", "message": f"Mission aborted: {event.result}" if event.failed else "Simulation complete"})
+
+class EventChannel:
+    """Bounded queue of events for one subscriber, drained in batches by the reader.
+
+    Publishing never blocks the simulation: a full queue drops token events, and any other event
+    evicts the oldest queued token (or, failing that, the oldest event) to make room.
+    """
+
+    def __init__(self, maxsize=EVENT_QUEUE_SIZE):
+        self._events = deque()
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.closed = False  # Set when the bus gives up on a reader that stopped draining
+        self.last_read = time.monotonic()
+
+    def publish(self, event):
+        with self._lock:
+            if len(self._events) >= self._maxsize:
+                self.dropped += 1
+                if isinstance(event, TokenReceived):
+                    # Tokens are best effort: AgentFinished carries the full message anyway
+                    return
+                self._evict()
+            self._events.append(event)
+
+    def _evict(self):
+        for index, queued in enumerate(self._events):
+            if isinstance(queued, TokenReceived):
+                del self._events[index]
+                return
+        self._events.popleft()
+
+    def drain(self, max_events=None):
+        with self._lock:
+            self.last_read = time.monotonic()
+            count = len(self._events) if max_events is None else min(max_events, len(self._events))
+            return [self._events.popleft() for _ in range(count)]
+
+    def abandoned(self, timeout=EVENT_SUBSCRIBER_TIMEOUT):
+        """Full and unread for timeout seconds: the session behind it has gone away."""
+        with self._lock:
+            return len(self._events) >= self._maxsize and time.monotonic() - self.last_read > timeout
+
+class EventBus:
+    """Routes events per mission to every channel subscribed to it, so sessions never see each other's missions."""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, mission_id, maxsize=EVENT_QUEUE_SIZE):
+        channel = EventChannel(maxsize)
+        with self._lock:
+            self._subscribers.setdefault(mission_id, []).append(channel)
+        return channel
+
+    def unsubscribe(self, mission_id, channel):
+        with self._lock:
+            channels = self._subscribers.get(mission_id, [])
+            if channel in channels:
+                channels.remove(channel)
+            if not channels:
+                self._subscribers.pop(mission_id, None)
+
+    def publish(self, mission_id, event):
+        with self._lock:
+            channels = list(self._subscribers.get(mission_id, ()))
+        for channel in channels:
+            if channel.abandoned():
+                channel.closed = True
+                self.unsubscribe(mission_id, channel)
+            else:
+                channel.publish(event)
+
+    def publisher(self, mission_id):
+        return MissionPublisher(self, mission_id)
+
+    def missions(self):
+        with self._lock:
+            return list(self._subscribers)
+
+@dataclass
+class MissionPublisher:
+    bus: Any
+    mission_id: str
+
+    def publish(self, event):
+        self.bus.publish(self.mission_id, event)
+
+event_bus = EventBus()
\ No newline at end of file
@@ -0,0 +1,110 @@
+import numpy as np
+
+ACTIVE, STANDBY, INACTIVE = 0, 1, 2
+STATUS_NAMES = ("active", "standby", "inactive")
+
+class Fleet:
+    """Every agent of a mission grouped by role, with battery, status and location held in arrays indexed by slot.
+
+    Agents read and write their own battery/status/location through these arrays, so fleet-wide updates
+    (failures, discharge, nearest-agent lookups) are single vectorized operations however many agents there are.
+    Standby agents sit out until an active agent of their role goes down.
+    """
+
+    def __init__(self, agents, roles, standby=()):
+        self.agents = list(agents)
+        self.roles = list(roles)
+        count = len(self.agents)
+        self.battery = np.full(count, 100, dtype=np.int16)
+        self.status = np.full(count, ACTIVE, dtype=np.int8)
+        self.location = np.zeros((count, 2), dtype=np.int32)
+        self._slots = {}
+        for slot, role in enumerate(self.roles):
+            self._slots.setdefault(role, []).append(slot)
+        self._slots = {role: np.array(slots) for role, slots in self._slots.items()}
+        for slot, agent in enumerate(self.agents):
+            agent.attach(self, slot)
+        self.status[list(standby)] = STANDBY
+        # How many agents of each role should be working at once; standby agents fill the gaps
+        self.sizes = {role: int((self.status[slots] == ACTIVE).sum()) for role, slots in self._slots.items()}
+
+    def __iter__(self):
+        return iter(self.agents)
+
+    def __len__(self):
+        return len(self.agents)
+
+    @property
+    def controller(self):
+        return self.agents[self._slots["controller"][0]]
+
+    def role_names(self):
+        return [role for role in self._slots if role != "controller"]
+
+    def members(self, role):
+        return [self.agents[slot] for slot in self._slots.get(role, ())]
+
+    def available(self, role):
+        """Slots of the role's active agents with charge left."""
+        slots = self._slots.get(role, np.empty(0, dtype=int))
+        return slots[(self.status[slots] == ACTIVE) & (self.battery[slots] > 0)]
+
+    def active_slots(self):
+        return np.flatnonzero(self.status == ACTIVE)
+
+    def fail(self, probability, rng):
+        """Take each active agent down with the given probability; returns the failed slots."""
+        active = self.active_slots()
+        failed = active[rng.random(active.size) < probability]
+        self.status[failed] = INACTIVE
+        return failed
+
+    def discharge(self, slots, low, high, rng):
+        """Drain low..high charge from each slot; returns the slots that ran flat and went inactive."""
+        slots = np.asarray(slots, dtype=int)
+        self.battery[slots] = np.maximum(self.battery[slots] - rng.integers(low, high + 1, slots.size), 0)
+        depleted = slots[self.battery[slots] == 0]
+        self.status[depleted] = INACTIVE
+        return depleted
+
+    def promote_standby(self):
+        """Activate standby agents for roles short of their working size; returns the promoted agents."""
+        promoted = []
+        for role, slots in self._slots.items():
+            missing = self.sizes[role] - int((self.status[slots] == ACTIVE).sum())
+            if missing > 0:
+                ready = slots[self.status[slots] == STANDBY][:missing]
+                self.status[ready] = ACTIVE
+                promoted.extend(self.agents[slot] for slot in ready)
+        return promoted
+
+    def nearest(self, slots, location):
+        """The slot among slots closest to location by Manhattan distance."""
+        distances = np.abs(self.location[slots] - np.asarray(location[:2])).sum(axis=1)
+        return slots[int(np.argmin(distances))]
+
+    def assign(self, slots, locations):
+        """For each location in turn, the nearest slot not yet given one; stops when slots run out."""
+        free = np.asarray(slots, dtype=int)
+        chosen = []
+        for location in locations:
+            if free.size == 0:
+                break
+            slot = self.nearest(free, location)
+            chosen.append(int(slot))
+            free = free[free != slot]
+        return chosen
+
+    def snapshot(self):
+        return {"roles": list(self.roles), "sizes": dict(self.sizes), "battery": self.battery.copy(), "status": self.status.copy(),
+                "location": self.location.copy(), "agents": [agent.snapshot() for agent in self.agents]}
+
+    @classmethod
+    def from_snapshot(cls, state, agents):
+        """Rebuild from a snapshot, given the agents restored from state["agents"] in the same order."""
+        fleet = cls(agents, state["roles"])
+        fleet.sizes = dict(state["sizes"])
+        fleet.battery[:] = state["battery"]
+        fleet.status[:] = state["status"]
+        fleet.location[:] = state["location"]
+        return fleet
\ No newline at end of file
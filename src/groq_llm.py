@@ -1,52 +1,202 @@
-from groq import Groq
+from groq import Groq, AsyncGroq, RateLimitError
+import asyncio
 import os
 import time
 from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from config.settings import RATE_LIMIT_RETRIES, LLM_CACHE_ENABLED, LLM_MODEL, LLM_FALLBACK_MODEL, LLM_TRANSIENT_RETRIES, LLM_SLOW_CALL_SECONDS
+from src.llm_cache import get_response_cache, make_cache_key
+from src.llm_backend import LLMBackend, format_messages
+from src.rate_limiter import get_rate_limiter, PRIORITY_NORMAL
+from src.tokens import estimate_message_tokens
+from src.instrumentation import tracer, record_usage
+from src.resilience import get_http_client, get_async_http_client, get_circuit_breaker, is_client_error, is_transient, retry_delay, CircuitOpenError
 
 # Load environment variables from .env file
 #load_dotenv()
 load_dotenv(dotenv_path='config/.env')
 
-class GroqLLM:
-    def __init__(self, model_name="deepseek-r1-distill-llama-70b"):
+class GroqLLM(LLMBackend):
+    """Groq chat completions behind the shared rate limiter, response cache and per-model circuit breakers.
+
+    Transient errors are retried with jittered backoff; client errors (a bad request, a bad key) are raised
+    as they are, without touching the breaker or falling back. When the primary model keeps failing or
+    answering slower than LLM_SLOW_CALL_SECONDS, its breaker opens and calls go to fallback_model
+    until a trial call succeeds again.
+    """
+
+    def __init__(self, model_name=LLM_MODEL, fallback_model=LLM_FALLBACK_MODEL, rate_limiter=None, cache=None):
         self.model_name = model_name
+        self.fallback_model = fallback_model if fallback_model != model_name else None
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             raise ValueError("GROQ_API_KEY not found in environment variables. Please set it in config/.env.")
         
-        # Initialize Groq client with minimal arguments
+        # Clients share one pooled HTTP connection pool; all retries are handled here and by the rate limiter
         try:
-            self.client = Groq(api_key=api_key)
+            self.client = Groq(api_key=api_key, max_retries=0, http_client=get_http_client())
+            self.async_client = AsyncGroq(api_key=api_key, max_retries=0, http_client=get_async_http_client())
         except TypeError as e:
             print(f"Error initializing Groq client: {e}")
             raise
-        self.last_call_time = 0
-
-    def __call__(self, messages, temperature=0.7, max_tokens=1024):
-        current_time = time.time()
-        time_since_last = current_time - self.last_call_time
-        if time_since_last < 20:
-            time.sleep(20 - time_since_last)
-
-        formatted_messages = []
-        for msg in messages:
-            if isinstance(msg, HumanMessage):
-                formatted_messages.append({"role": "user", "content": msg.content})
-            elif isinstance(msg, AIMessage):
-                formatted_messages.append({"role": "assistant", "content": msg.content})
-            elif isinstance(msg, SystemMessage):
-                formatted_messages.append({"role": "system", "content": msg.content})
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        if cache is None and LLM_CACHE_ENABLED:
+            cache = get_response_cache()
+        self.cache = cache
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=formatted_messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
-            self.last_call_time = time.time()
-            return response.choices[0].message.content
-        except Exception as e:
-            print(f"Error during API call: {e}")
-            raise
\ No newline at end of file
+    def _models(self):
+        models = [self.model_name] + ([self.fallback_model] if self.fallback_model else [])
+        return [(model, get_circuit_breaker(model)) for model in models]
+
+    def _settle(self, breaker, elapsed):
+        # A slow answer is still used, but counts against the model like a failure
+        if elapsed > LLM_SLOW_CALL_SECONDS:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def _retry_or_raise(self, error, reserved_tokens, rate_limited, transient, span):
+        """Bookkeeping for a failed attempt; returns the updated (rate_limited, transient) counts and the seconds to back off."""
+        # Nothing was generated, so hand the reserved tokens back before the next acquire or the raise
+        self.rate_limiter.record_usage(reserved_tokens, 0)
+        if isinstance(error, RateLimitError):
+            self.rate_limiter.on_rate_limited(error.response.headers)
+            if rate_limited == RATE_LIMIT_RETRIES:
+                raise error
+            span.attrs["retries"] += 1
+            return rate_limited + 1, transient, 0
+        if not is_transient(error) or transient == LLM_TRANSIENT_RETRIES:
+            raise error
+        span.attrs["retries"] += 1
+        return rate_limited, transient + 1, retry_delay(transient)
+
+    def _complete(self, model, formatted_messages, temperature, max_tokens, reserved_tokens, priority, span):
+        rate_limited = transient = 0
+        while True:
+            span.attrs["wait"] += self.rate_limiter.acquire(tokens=reserved_tokens, priority=priority)
+            sent = time.perf_counter()
+            try:
+                raw = self.client.chat.completions.with_raw_response.create(
+                    model=model,
+                    messages=formatted_messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+            except Exception as e:
+                rate_limited, transient, delay = self._retry_or_raise(e, reserved_tokens, rate_limited, transient, span)
+                time.sleep(delay)
+                continue
+            self.rate_limiter.update_from_headers(raw.headers)
+            response = raw.parse()
+            elapsed = time.perf_counter() - sent
+            if response.usage:
+                self.rate_limiter.record_usage(reserved_tokens, response.usage.total_tokens)
+                record_usage(span, model, response.usage, elapsed)
+            return response.choices[0].message.content, elapsed
+
+    def __call__(self, messages, temperature=0.7, max_tokens=1024, priority=PRIORITY_NORMAL):
+        with tracer.span("llm", self.model_name, priority=priority, wait=0.0, retries=0) as span:
+            formatted_messages = format_messages(messages)
+            cache_key = None
+            if self.cache is not None:
+                cache_key = make_cache_key(self.model_name, temperature, max_tokens, formatted_messages)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    span.attrs["cache_hit"] = True
+                    return cached
+
+            # Reserve the worst case up front and settle against the billed usage afterwards
+            reserved_tokens = estimate_message_tokens(messages) + max_tokens
+            last_error = None
+            for model, breaker in self._models():
+                if not breaker.allow():
+                    continue
+                try:
+                    content, elapsed = self._complete(model, formatted_messages, temperature, max_tokens, reserved_tokens, priority, span)
+                except Exception as e:
+                    if is_client_error(e):
+                        # A bad request fails on every model and says nothing about this one's health
+                        breaker.release()
+                        raise
+                    breaker.record_failure()
+                    print(f"Error during API call to {model}: {e}")
+                    last_error = e
+                    continue
+                self._settle(breaker, elapsed)
+                span.attrs["model"] = model
+                # Fallback answers aren't cached, so the primary model gets asked again next time
+                if cache_key is not None and model == self.model_name:
+                    self.cache.put(cache_key, self.model_name, content)
+                return content
+            raise last_error or CircuitOpenError(f"No model available: circuit open for {self.model_name}"
+                                                 + (f" and {self.fallback_model}" if self.fallback_model else ""))
+
+    async def _open_stream(self, model, formatted_messages, temperature, max_tokens, reserved_tokens, priority, span):
+        rate_limited = transient = 0
+        while True:
+            span.attrs["wait"] += await asyncio.to_thread(self.rate_limiter.acquire, reserved_tokens, priority)
+            sent = time.perf_counter()
+            try:
+                stream = await self.async_client.chat.completions.create(
+                    model=model,
+                    messages=formatted_messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                )
+            except Exception as e:
+                rate_limited, transient, delay = self._retry_or_raise(e, reserved_tokens, rate_limited, transient, span)
+                await asyncio.sleep(delay)
+                continue
+            self.rate_limiter.update_from_headers(stream.response.headers)
+            return stream, sent
+
+    async def astream(self, messages, temperature=0.7, max_tokens=1024, priority=PRIORITY_NORMAL):
+        """Async generator yielding completion text chunks as they arrive.
+        Falls back to the next model only while nothing has been yielded yet."""
+        # Not activated: the span stays open across yields back into the caller's context
+        with tracer.span("llm", self.model_name, activate=False, priority=priority, stream=True, wait=0.0, retries=0) as span:
+            formatted_messages = format_messages(messages)
+            cache_key = None
+            if self.cache is not None:
+                cache_key = make_cache_key(self.model_name, temperature, max_tokens, formatted_messages)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    span.attrs["cache_hit"] = True
+                    yield cached
+                    return
+
+            reserved_tokens = estimate_message_tokens(messages) + max_tokens
+            last_error = None
+            for model, breaker in self._models():
+                if not breaker.allow():
+                    continue
+                chunks = []
+                try:
+                    stream, sent = await self._open_stream(model, formatted_messages, temperature, max_tokens, reserved_tokens, priority, span)
+                    async for chunk in stream:
+                        if chunk.x_groq and chunk.x_groq.usage:
+                            self.rate_limiter.record_usage(reserved_tokens, chunk.x_groq.usage.total_tokens)
+                            record_usage(span, model, chunk.x_groq.usage, time.perf_counter() - sent)
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            if not chunks:
+                                span.attrs["first_token"] = time.perf_counter() - sent
+                            chunks.append(chunk.choices[0].delta.content)
+                            yield chunk.choices[0].delta.content
+                except Exception as e:
+                    if is_client_error(e):
+                        breaker.release()
+                        raise
+                    breaker.record_failure()
+                    print(f"Error during API stream from {model}: {e}")
+                    if chunks:
+                        raise
+                    last_error = e
+                    continue
+                self._settle(breaker, time.perf_counter() - sent)
+                span.attrs["model"] = model
+                # Only complete streams from the primary model are cached
+                if cache_key is not None and model == self.model_name:
+                    self.cache.put(cache_key, self.model_name, "".join(chunks))
+                return
+            raise last_error or CircuitOpenError(f"No model available: circuit open for {self.model_name}"
+                                                 + (f" and {self.fallback_model}" if self.fallback_model else ""))
\ No newline at end of file
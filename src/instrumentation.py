@@ -0,0 +1,198 @@
+import argparse
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from config.settings import TRACE_MAX_SPANS, TRACE_EXPORT_PATH, LLM_PRICES_PER_MILLION
+
+SPAN_KINDS = ("mission", "step", "throttle", "checkpoint", "agent", "llm")
+# Where an LLM call's wall time went: local rate-limit wait, time on the wire, and the server's own phases
+LLM_PHASES = ("wait", "network", "queue", "prompt", "generation")
+
+_span_ids = itertools.count(1)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+@dataclass
+class Span:
+    kind: str
+    name: str
+    span_id: int
+    parent_id: int = None
+    trace_id: int = None
+    start: float = 0.0
+    duration: float = 0.0
+    attrs: dict = field(default_factory=dict)
+
+def current_span():
+    return _current_span.get()
+
+def llm_cost(model, prompt_tokens, completion_tokens):
+    """USD cost of one call from LLM_PRICES_PER_MILLION; unknown models cost 0."""
+    prompt_price, completion_price = LLM_PRICES_PER_MILLION.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+def record_usage(span, model, usage, elapsed):
+    """Copy token counts and Groq's server-side timings onto an LLM span; the remainder of elapsed is network."""
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    queue = getattr(usage, "queue_time", 0) or 0
+    prompt = getattr(usage, "prompt_time", 0) or 0
+    generation = getattr(usage, "completion_time", 0) or 0
+    span.attrs.update({"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                       "queue": queue, "prompt": prompt, "generation": generation,
+                       "network": max(0.0, elapsed - queue - prompt - generation),
+                       "cost": llm_cost(model, prompt_tokens, completion_tokens)})
+
+class Tracer:
+    """Collects timed spans for missions, steps, agent tasks and LLM calls.
+
+    Spans nest through a context variable, so an LLM call picks up the agent span it runs under;
+    pass parent explicitly when the child runs on another thread, and activate=False for leaf spans
+    held open across an async generator's yields. Finished spans are kept in a
+    bounded buffer and can be summarised, written as JSON lines or rendered as Prometheus text.
+    """
+
+    def __init__(self, max_spans=TRACE_MAX_SPANS, export_path=TRACE_EXPORT_PATH):
+        self.export_path = export_path
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, kind, name, parent=None, activate=True, **attrs):
+        parent = parent or _current_span.get()
+        span_id = next(_span_ids)
+        span = Span(kind, name, span_id, parent.span_id if parent else None, parent.trace_id if parent else span_id, time.time(), attrs=attrs)
+        token = _current_span.set(span) if activate else None
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            if token is not None:
+                _current_span.reset(token)
+            with self._lock:
+                self._spans.append(span)
+
+    def spans(self, trace_id=None, kind=None):
+        with self._lock:
+            spans = list(self._spans)
+        return [span for span in spans if (trace_id is None or span.trace_id == trace_id) and (kind is None or span.kind == kind)]
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def summary(self, trace_id=None):
+        return summarize(self.spans(trace_id))
+
+    def export_jsonl(self, path, trace_id=None):
+        """Append spans as one JSON object per line, in a single write so concurrent processes don't interleave."""
+        lines = "".join(json.dumps(asdict(span)) + "\n" for span in self.spans(trace_id))
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def export_trace(self, trace_id):
+        """Append one finished trace to export_path, if exporting is enabled."""
+        if self.export_path:
+            self.export_jsonl(self.export_path, trace_id)
+
+    def prometheus(self, trace_id=None):
+        return to_prometheus(summarize(self.spans(trace_id)))
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+def summarize(spans):
+    """Per-kind duration stats, per-agent totals and the LLM wait/network/server breakdown."""
+    by_kind = {}
+    for kind in SPAN_KINDS:
+        durations = [span.duration for span in spans if span.kind == kind]
+        if durations:
+            by_kind[kind] = {"count": len(durations), "total": sum(durations), "mean": sum(durations) / len(durations),
+                             "p95": _percentile(durations, 0.95), "max": max(durations)}
+    agents = {}
+    for span in spans:
+        if span.kind == "agent":
+            totals = agents.setdefault(span.name, {"tasks": 0, "seconds": 0.0})
+            totals["tasks"] += 1
+            totals["seconds"] += span.duration
+    calls = [span for span in spans if span.kind == "llm"]
+    llm = {"calls": len(calls), "cache_hits": sum(1 for span in calls if span.attrs.get("cache_hit")),
+           "retries": sum(span.attrs.get("retries", 0) for span in calls), "errors": sum(1 for span in calls if "error" in span.attrs)}
+    for phase in LLM_PHASES:
+        llm[phase] = sum(span.attrs.get(phase, 0.0) for span in calls)
+    for counter in ("prompt_tokens", "completion_tokens", "cost"):
+        llm[counter] = sum(span.attrs.get(counter, 0) for span in calls)
+    return {"spans": by_kind, "agents": agents, "llm": llm}
+
+def to_prometheus(summary, prefix="disaster_response"):
+    """Render a summary in the Prometheus text exposition format."""
+    lines = [f"# TYPE {prefix}_span_seconds summary"]
+    for kind, stats in summary["spans"].items():
+        lines.append(f'{prefix}_span_seconds{{kind="{kind}",quantile="0.95"}} {stats["p95"]:.6f}')
+        lines.append(f'{prefix}_span_seconds_sum{{kind="{kind}"}} {stats["total"]:.6f}')
+        lines.append(f'{prefix}_span_seconds_count{{kind="{kind}"}} {stats["count"]}')
+    lines.append(f"# TYPE {prefix}_agent_seconds_total counter")
+    for agent, totals in summary["agents"].items():
+        lines.append(f'{prefix}_agent_seconds_total{{agent="{agent}"}} {totals["seconds"]:.6f}')
+    llm = summary["llm"]
+    lines.append(f"# TYPE {prefix}_llm_seconds_total counter")
+    lines.extend(f'{prefix}_llm_seconds_total{{phase="{phase}"}} {llm[phase]:.6f}' for phase in LLM_PHASES)
+    lines.append(f"# TYPE {prefix}_llm_tokens_total counter")
+    lines.append(f'{prefix}_llm_tokens_total{{type="prompt"}} {llm["prompt_tokens"]}')
+    lines.append(f'{prefix}_llm_tokens_total{{type="completion"}} {llm["completion_tokens"]}')
+    for counter in ("calls", "cache_hits", "retries", "errors"):
+        lines.append(f"# TYPE {prefix}_llm_{counter}_total counter")
+        lines.append(f"{prefix}_llm_{counter}_total {llm[counter]}")
+    lines.append(f"# TYPE {prefix}_llm_cost_usd_total counter")
+    lines.append(f"{prefix}_llm_cost_usd_total {llm['cost']:.6f}")
+    return "\n".join(lines) + "\n"
+
+def load_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [Span(**json.loads(line)) for line in f if line.strip()]
+
+def format_report(summary):
+    """Plain-text profiling report: where mission time went, slowest agents first."""
+    lines = [f"{'span':<10}{'count':>7}{'total s':>10}{'mean s':>9}{'p95 s':>9}{'max s':>9}"]
+    for kind, stats in summary["spans"].items():
+        lines.append(f"{kind:<10}{stats['count']:>7}{stats['total']:>10.2f}{stats['mean']:>9.3f}{stats['p95']:>9.3f}{stats['max']:>9.3f}")
+    llm = summary["llm"]
+    lines.append("")
+    lines.append(f"LLM calls: {llm['calls']} ({llm['cache_hits']} cached, {llm['retries']} rate-limit retries, {llm['errors']} errors)")
+    lines.append("LLM time: " + ", ".join(f"{phase} {llm[phase]:.2f}s" for phase in LLM_PHASES))
+    lines.append(f"Tokens: {llm['prompt_tokens']} prompt, {llm['completion_tokens']} completion, ${llm['cost']:.4f}")
+    lines.append("")
+    for agent, totals in sorted(summary["agents"].items(), key=lambda item: -item[1]["seconds"]):
+        lines.append(f"{agent:<12}{totals['tasks']:>4} tasks {totals['seconds']:>8.2f}s")
+    return "\n".join(lines)
+
+tracer = Tracer()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise exported simulation traces.")
+    parser.add_argument("path", help="JSON lines file written by Tracer.export_jsonl")
+    parser.add_argument("--format", choices=("report", "prometheus", "json"), default="report")
+    args = parser.parse_args(argv)
+    summary = summarize(load_jsonl(args.path))
+    if args.format == "prometheus":
+        print(to_prometheus(summary), end="")
+    elif args.format == "json":
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_report(summary))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
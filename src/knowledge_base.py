@@ -0,0 +1,169 @@
+import csv
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from config.settings import KNOWLEDGE_BASE_PATH, LEGACY_KNOWLEDGE_BASE_CSV
+from src.prompts import strip_reasoning
+
+RUN_FIELDS = ["timestamp", "disaster_type", "affected_areas", "grid_size", "steps", "seed", "rescued", "supplied", "open_victims",
+              "failures", "depleted", "tasks", "mean_step_latency", "duration", "status", "source"]
+_STEP_NOTICE = re.compile(r"^Step (\d+)/\d+")
+_INSERT_RUN = f"INSERT INTO runs ({', '.join(RUN_FIELDS)}) VALUES ({', '.join('?' for _ in RUN_FIELDS)})"
+
+def responses_from_chat_log(chat_log):
+    """(step, agent, message) for every agent reply in a chat log, using the System step notices for numbering.
+    Reasoning traces are stripped; only the answers are worth keeping."""
+    responses = []
+    step = 0
+    for entry in chat_log:
+        if entry["sender"] == "System":
+            match = _STEP_NOTICE.match(entry["message"])
+            if match:
+                step = int(match.group(1))
+        else:
+            message = strip_reasoning(entry["message"])
+            if message:
+                responses.append((step, entry["sender"], message))
+    return responses
+
+class KnowledgeBase:
+    """SQLite store of past missions: one row per run plus every agent response, indexed by disaster type and time."""
+
+    def __init__(self, path=KNOWLEDGE_BASE_PATH, legacy_csv=LEGACY_KNOWLEDGE_BASE_CSV):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                disaster_type TEXT NOT NULL,
+                affected_areas INTEGER,
+                grid_size INTEGER,
+                steps INTEGER,
+                seed INTEGER,
+                rescued INTEGER,
+                supplied INTEGER,
+                open_victims INTEGER,
+                failures INTEGER,
+                depleted INTEGER,
+                tasks INTEGER,
+                mean_step_latency REAL,
+                duration REAL,
+                status TEXT,
+                source TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_runs_type_time ON runs (disaster_type, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_runs_time ON runs (timestamp);
+            CREATE TABLE IF NOT EXISTS responses (
+                id INTEGER PRIMARY KEY,
+                run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+                step INTEGER,
+                agent TEXT NOT NULL,
+                message TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_run ON responses (run_id);
+            CREATE INDEX IF NOT EXISTS idx_responses_agent ON responses (agent);
+        """)
+        self._conn.commit()
+        if legacy_csv and os.path.exists(legacy_csv) and self.count_runs() == 0:
+            self.import_csv(legacy_csv)
+
+    def _run_values(self, run, source):
+        run = dict(run)
+        run.setdefault("timestamp", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        run.setdefault("source", source)
+        if "affected_areas" not in run and "affected" in run:
+            run["affected_areas"] = run["affected"]
+        return [run.get(field) if run.get(field) != "" else None for field in RUN_FIELDS]
+
+    def record_run(self, run, responses=(), source="ui"):
+        """Store one run (a dict of RUN_FIELDS, extra keys ignored) with its (step, agent, message) responses."""
+        with self._lock, self._conn:
+            run_id = self._conn.execute(_INSERT_RUN, self._run_values(run, source)).lastrowid
+            self._conn.executemany("INSERT INTO responses (run_id, step, agent, message) VALUES (?, ?, ?, ?)",
+                                   [(run_id, step, agent, message) for step, agent, message in responses])
+        return run_id
+
+    def record_runs(self, runs, source="batch"):
+        """Bulk insert many runs in a single transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany(_INSERT_RUN, [self._run_values(run, source) for run in runs])
+        return len(runs)
+
+    def import_csv(self, path):
+        """Load the legacy Timestamp / Disaster Type / Affected Areas CSV."""
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [{"timestamp": row["Timestamp"], "disaster_type": row["Disaster Type"], "affected_areas": int(row["Affected Areas"])}
+                    for row in csv.DictReader(f) if row.get("Timestamp")]
+        return self.record_runs(rows, source="csv")
+
+    def count_runs(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def aggregate_by_type(self, since=None):
+        """Per disaster type: run count and averages, optionally only for runs at or after `since` (YYYY-MM-DD[ HH:MM:SS])."""
+        sql = """
+            SELECT disaster_type, COUNT(*) AS runs, AVG(affected_areas) AS avg_affected, AVG(rescued) AS avg_rescued,
+                   AVG(supplied) AS avg_supplied, AVG(failures + depleted) AS avg_failures, AVG(mean_step_latency) AS avg_step_latency,
+                   MAX(timestamp) AS last_run
+            FROM runs {where} GROUP BY disaster_type ORDER BY disaster_type
+        """
+        with self._lock:
+            if since:
+                rows = self._conn.execute(sql.format(where="WHERE timestamp >= ?"), (since,)).fetchall()
+            else:
+                rows = self._conn.execute(sql.format(where="")).fetchall()
+        return [dict(row) for row in rows]
+
+    def recent_runs(self, disaster_type=None, limit=10):
+        with self._lock:
+            if disaster_type:
+                rows = self._conn.execute("SELECT * FROM runs WHERE disaster_type = ? ORDER BY timestamp DESC LIMIT ?", (disaster_type, limit)).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM runs ORDER BY timestamp DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def responses_after(self, last_id=0, limit=None):
+        """Agent responses with id > last_id, oldest first, joined with their run's disaster type."""
+        sql = """
+            SELECT responses.id, responses.run_id, responses.step, responses.agent, responses.message, runs.disaster_type
+            FROM responses JOIN runs ON runs.id = responses.run_id
+            WHERE responses.id > ? ORDER BY responses.id
+        """
+        with self._lock:
+            if limit:
+                rows = self._conn.execute(sql + " LIMIT ?", (last_id, limit)).fetchall()
+            else:
+                rows = self._conn.execute(sql, (last_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def responses_by_ids(self, response_ids):
+        if not response_ids:
+            return []
+        placeholders = ", ".join("?" for _ in response_ids)
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT responses.id, responses.run_id, responses.step, responses.agent, responses.message, runs.disaster_type
+                FROM responses JOIN runs ON runs.id = responses.run_id
+                WHERE responses.id IN ({placeholders})
+            """, list(response_ids)).fetchall()
+        return [dict(row) for row in rows]
+
+_knowledge_base = None
+_knowledge_base_lock = threading.Lock()
+
+def get_knowledge_base():
+    global _knowledge_base
+    with _knowledge_base_lock:
+        if _knowledge_base is None:
+            _knowledge_base = KnowledgeBase()
+        return _knowledge_base
\ No newline at end of file
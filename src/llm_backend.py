@@ -0,0 +1,39 @@
+import asyncio
+import os
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from config.settings import LLM_BACKEND
+from src.rate_limiter import PRIORITY_NORMAL
+
+def format_messages(messages):
+    formatted_messages = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage):
+            formatted_messages.append({"role": "user", "content": msg.content})
+        elif isinstance(msg, AIMessage):
+            formatted_messages.append({"role": "assistant", "content": msg.content})
+        elif isinstance(msg, SystemMessage):
+            formatted_messages.append({"role": "system", "content": msg.content})
+    return formatted_messages
+
+class LLMBackend:
+    """Interface the agents talk to: a blocking call and an async stream of text chunks."""
+
+    model_name = None
+
+    def __call__(self, messages, temperature=0.7, max_tokens=1024, priority=PRIORITY_NORMAL):
+        raise NotImplementedError
+
+    async def astream(self, messages, temperature=0.7, max_tokens=1024, priority=PRIORITY_NORMAL):
+        # Backends without native streaming yield the whole completion as one chunk
+        yield await asyncio.to_thread(self, messages, temperature, max_tokens, priority)
+
+def get_llm(backend=None, **kwargs):
+    """Build an LLM backend by name: 'groq' or 'mock'. Defaults to $LLM_BACKEND, then settings."""
+    backend = backend or os.getenv("LLM_BACKEND") or LLM_BACKEND
+    if backend == "groq":
+        from src.groq_llm import GroqLLM
+        return GroqLLM(**kwargs)
+    if backend == "mock":
+        from src.mock_llm import MockLLM
+        return MockLLM(**kwargs)
+    raise ValueError(f"Unknown LLM backend: {backend}")
\ No newline at end of file
@@ -0,0 +1,86 @@
+import re
+import threading
+from collections import deque
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from config.settings import MEMORY_MAX_MESSAGES, MEMORY_TOKEN_BUDGET, MEMORY_SUMMARY_TOKENS
+from src.tokens import CHARS_PER_TOKEN, estimate_message_tokens
+
+_MESSAGE_TYPES = {"system": SystemMessage, "human": HumanMessage, "ai": AIMessage}
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+GIST_TOKENS = 40  # Longest single-turn entry kept in the rolling summary
+
+def _gist(text):
+    text = " ".join(text.split())
+    first = _SENTENCE_END.split(text, maxsplit=1)[0]
+    limit = GIST_TOKENS * CHARS_PER_TOKEN
+    return first if len(first) <= limit else first[:limit].rstrip() + "..."
+
+class AgentMemory:
+    """Bounded agent memory: a ring buffer of recent turns plus a rolling summary of evicted ones.
+
+    window() picks the prompt context by token count rather than message count, so per-call
+    prompt size stays predictable however long the mission runs.
+    """
+
+    def __init__(self, max_messages=MEMORY_MAX_MESSAGES, token_budget=MEMORY_TOKEN_BUDGET, summary_tokens=MEMORY_SUMMARY_TOKENS):
+        self.max_messages = max_messages
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.messages = deque()
+        self.summary = ""
+        self._lock = threading.Lock()
+
+    def append(self, message):
+        with self._lock:
+            self.messages.append(message)
+            while len(self.messages) > self.max_messages:
+                self._compact(self.messages.popleft())
+
+    def _compact(self, message):
+        gist = _gist(message.content)
+        if not gist:
+            return
+        self.summary = f"{self.summary} {gist}".strip()
+        limit = self.summary_tokens * CHARS_PER_TOKEN
+        if len(self.summary) > limit:
+            # Drop the oldest material, cutting at a word boundary
+            self.summary = self.summary[-limit:].split(" ", 1)[-1]
+
+    def window(self, token_budget=None):
+        """Summary message followed by the newest turns that fit in the token budget, oldest first."""
+        budget = self.token_budget if token_budget is None else token_budget
+        with self._lock:
+            context = [SystemMessage(content=f"Summary of your earlier activity: {self.summary}")] if self.summary else []
+            used = estimate_message_tokens(context)
+            selected = []
+            for message in reversed(self.messages):
+                cost = estimate_message_tokens([message])
+                if used + cost > budget:
+                    if not selected:
+                        # Always keep the latest turn, trimmed to whatever budget is left
+                        room = max(budget - used, 0) * CHARS_PER_TOKEN
+                        selected.append(type(message)(content=message.content[:room]))
+                    break
+                selected.append(message)
+                used += cost
+        return context + selected[::-1]
+
+    def snapshot(self):
+        with self._lock:
+            return {"messages": [(message.type, message.content) for message in self.messages], "summary": self.summary}
+
+    def restore(self, state):
+        with self._lock:
+            self.messages = deque(_MESSAGE_TYPES[kind](content=content) for kind, content in state["messages"])
+            self.summary = state["summary"]
+
+    def clear(self):
+        with self._lock:
+            self.messages.clear()
+            self.summary = ""
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(list(self.messages))
\ No newline at end of file
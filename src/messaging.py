@@ -0,0 +1,97 @@
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Optional
+from config.settings import AGENT_INBOX_SIZE
+
+PLAN_TOPIC = "plan"  # The Controller's broadcast plan; every agent subscribes and reads it into memory
+# Work topics each role's shared queue listens on; the dispatcher hands queued work to the role's free agents
+ROLE_TOPICS = {
+    "routes": ("blockage",),
+    "drone": ("survey",),
+    "assess": ("assess",),
+    "rescue": ("victim",),
+    "supplies": ("supply_need",),
+    "medical": ("casualty",),
+}
+
+@dataclass(frozen=True)
+class Message:
+    sender: str
+    body: str
+    topic: Optional[str] = None  # Delivered to every subscriber of the topic except the sender
+    recipient: Optional[str] = None  # Or to one agent by name
+    target: Optional[tuple] = None  # Cell the work is about; messages without one are notes for memory
+    step: int = 0
+
+class MessageRouter:
+    """Named inboxes with topic subscriptions: one per agent, plus one shared work queue per role.
+
+    Senders never wait for recipients: messages queue in bounded inboxes (the oldest is dropped when
+    one overflows) and are drained when the simulation gives their owner a turn.
+    """
+
+    def __init__(self, inbox_size=AGENT_INBOX_SIZE):
+        self.inbox_size = inbox_size
+        self._inboxes = {}
+        self._topics = defaultdict(list)
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.dropped = 0
+
+    def register(self, name, topics=(), inbox_size=None):
+        with self._lock:
+            self._inboxes.setdefault(name, deque(maxlen=inbox_size or self.inbox_size))
+            for topic in topics:
+                if name not in self._topics[topic]:
+                    self._topics[topic].append(name)
+
+    def send(self, message):
+        """Queue message for its recipient or topic subscribers; returns how many inboxes it reached."""
+        with self._lock:
+            if message.recipient is not None:
+                names = [message.recipient] if message.recipient in self._inboxes else []
+            else:
+                names = [name for name in self._topics.get(message.topic, ()) if name != message.sender]
+            for name in names:
+                inbox = self._inboxes[name]
+                if len(inbox) == inbox.maxlen:
+                    self.dropped += 1
+                inbox.append(message)
+            self.sent += len(names)
+            return len(names)
+
+    def pop(self, name):
+        with self._lock:
+            inbox = self._inboxes.get(name)
+            return inbox.popleft() if inbox else None
+
+    def take(self, name, limit, is_stale=None):
+        """Pop up to limit messages from an inbox, discarding stale ones on the way."""
+        taken = []
+        with self._lock:
+            inbox = self._inboxes.get(name)
+            while inbox and len(taken) < limit:
+                message = inbox.popleft()
+                if is_stale is None or not is_stale(message):
+                    taken.append(message)
+        return taken
+
+    def pending(self, name):
+        with self._lock:
+            return len(self._inboxes.get(name, ()))
+
+    def snapshot(self):
+        with self._lock:
+            return {"inboxes": {name: (inbox.maxlen, list(inbox)) for name, inbox in self._inboxes.items()},
+                    "topics": {topic: list(names) for topic, names in self._topics.items()},
+                    "sent": self.sent, "dropped": self.dropped}
+
+    @classmethod
+    def from_snapshot(cls, state, inbox_size=AGENT_INBOX_SIZE):
+        router = cls(inbox_size)
+        router._inboxes = {name: deque(messages, maxlen=maxlen) for name, (maxlen, messages) in state["inboxes"].items()}
+        router._topics.update({topic: list(names) for topic, names in state["topics"].items()})
+        router.sent = state["sent"]
+        router.dropped = state["dropped"]
+        return router
\ No newline at end of file
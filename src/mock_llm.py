@@ -0,0 +1,97 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from langchain_core.messages import HumanMessage, SystemMessage
+from config.settings import MOCK_LLM_LATENCY, MOCK_LLM_JITTER, MOCK_LLM_RESPONSE_TOKENS
+from src.llm_backend import LLMBackend
+from src.rate_limiter import PRIORITY_NORMAL
+from src.tokens import estimate_message_tokens
+from src.instrumentation import tracer
+
+_AGENT_HEADER = re.compile(r"You are (?P<name>[^,]+), an? (?P<agent_type>[^.]+?) with capabilities")
+_FILLER = ("Proceeding with the assigned operation while monitoring hazards, coordinating with the "
+           "controller and reporting progress at each checkpoint.").split()
+
+class MockLLM(LLMBackend):
+    """Offline stand-in for GroqLLM with templated replies and configurable latency and size.
+
+    responses may map an agent name (or name prefix such as 'Drone') to a fixed reply or to a
+    callable taking (agent_name, task) and returning the reply text.
+    """
+
+    model_name = "mock"
+
+    def __init__(self, latency=MOCK_LLM_LATENCY, jitter=MOCK_LLM_JITTER, response_tokens=MOCK_LLM_RESPONSE_TOKENS, responses=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.response_tokens = response_tokens
+        self.responses = responses or {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def _reply(self, messages):
+        agent_name, task = "Agent", ""
+        for msg in messages:
+            if isinstance(msg, SystemMessage):
+                match = _AGENT_HEADER.search(msg.content)
+                if match:
+                    agent_name = match.group("name")
+            elif isinstance(msg, HumanMessage):
+                task = msg.content
+
+        reply = self.responses.get(agent_name)
+        if reply is None:
+            reply = next((value for prefix, value in self.responses.items() if agent_name.startswith(prefix)), None)
+        if callable(reply):
+            return reply(agent_name, task)
+        if reply is not None:
+            return reply
+
+        words = f"{agent_name} acknowledging: {' '.join(task.split()[:40])}".split()
+        while len(words) < self.response_tokens:
+            words.extend(_FILLER)
+        return " ".join(words[:self.response_tokens])
+
+    def _delay(self):
+        with self._lock:
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def _record(self, messages, reply, span, delay):
+        prompt_tokens, completion_tokens = estimate_message_tokens(messages), len(reply.split())
+        # All simulated latency counts as generation, so traces of mock runs isolate local overhead
+        span.attrs.update({"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "generation": delay})
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def __call__(self, messages, temperature=0.7, max_tokens=1024, priority=PRIORITY_NORMAL):
+        with tracer.span("llm", self.model_name, priority=priority) as span:
+            delay = self._delay()
+            if delay:
+                time.sleep(delay)
+            reply = self._reply(messages)
+            self._record(messages, reply, span, delay)
+            return reply
+
+    async def astream(self, messages, temperature=0.7, max_tokens=1024, priority=PRIORITY_NORMAL):
+        with tracer.span("llm", self.model_name, activate=False, priority=priority, stream=True) as span:
+            reply = self._reply(messages)
+            words = reply.split(" ")
+            # Spread the latency across the words to mimic token-by-token delivery
+            delay = self._delay()
+            per_word = delay / max(len(words), 1)
+            for i, word in enumerate(words):
+                if per_word:
+                    await asyncio.sleep(per_word)
+                yield word if i == 0 else " " + word
+            self._record(messages, reply, span, delay)
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens}
\ No newline at end of file
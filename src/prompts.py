@@ -0,0 +1,100 @@
+import re
+from collections import defaultdict
+from langchain_core.messages import HumanMessage, SystemMessage
+from config.settings import MAX_DELTA_CELLS_IN_PROMPT, MEMORY_TOKEN_BUDGET
+from src.tokens import CHARS_PER_TOKEN, estimate_tokens, estimate_message_tokens
+
+_THINK_BLOCK = re.compile(r"<think>.*?(?:</think>|$)", re.DOTALL | re.IGNORECASE)
+CLUSTER_LIST_LIMIT = 3  # Clusters up to this size are listed cell by cell, larger ones as a bounding box
+
+def strip_reasoning(text):
+    """Drop <think>...</think> sections (and an unterminated trailing one) from a reasoning model's reply."""
+    if not text or "<think>" not in text.lower():
+        return text
+    return _THINK_BLOCK.sub("", text).strip()
+
+def _clusters(points):
+    """Groups of 8-connected cells, each sorted, largest group first."""
+    remaining = set(points)
+    clusters = []
+    while remaining:
+        stack = [remaining.pop()]
+        cluster = []
+        while stack:
+            x, y = stack.pop()
+            cluster.append((x, y))
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    neighbour = (x + dx, y + dy)
+                    if neighbour in remaining:
+                        remaining.remove(neighbour)
+                        stack.append(neighbour)
+        clusters.append(sorted(cluster))
+    clusters.sort(key=lambda cluster: (-len(cluster), cluster[0]))
+    return clusters
+
+def _encode_cluster(cluster):
+    if len(cluster) <= CLUSTER_LIST_LIMIT:
+        return " ".join(f"{x},{y}" for x, y in cluster)
+    xs = [x for x, _ in cluster]
+    ys = [y for _, y in cluster]
+    box = f"{min(xs)}-{max(xs)},{min(ys)}-{max(ys)}"
+    area = (max(xs) - min(xs) + 1) * (max(ys) - min(ys) + 1)
+    return f"[{box} all]" if area == len(cluster) else f"[{box} {len(cluster)} cells]"
+
+def encode_cells(cells, limit=MAX_DELTA_CELLS_IN_PROMPT):
+    """Compact coordinates for prompts: 'x,y' for isolated cells and '[x0-x1,y0-y1 n cells]' bounding boxes for
+    clusters, at most limit groups listed. Cells carrying a third field (e.g. supply type) are grouped by it first."""
+    if not cells:
+        return "none"
+    groups = defaultdict(list)
+    for cell in cells:
+        groups[cell[2] if len(cell) > 2 else None].append((int(cell[0]), int(cell[1])))
+    parts = []
+    for label, points in sorted(groups.items(), key=lambda item: str(item[0])):
+        clusters = _clusters(points)
+        encoded = "; ".join(_encode_cluster(cluster) for cluster in clusters[:limit])
+        if len(clusters) > limit:
+            encoded += f" (+{sum(len(cluster) for cluster in clusters[limit:])} cells elsewhere)"
+        parts.append(f"{label}: {encoded}" if label is not None else encoded)
+    return " | ".join(parts)
+
+def truncate_to_tokens(text, budget):
+    """Cut text to roughly budget tokens at a word boundary."""
+    if estimate_tokens(text) <= budget:
+        return text
+    cut = text[:max(budget, 0) * CHARS_PER_TOKEN]
+    while cut and estimate_tokens(cut) > budget:
+        cut = cut[:int(len(cut) * 0.9)]
+    return cut.rsplit(" ", 1)[0] + " ..."
+
+def build_messages(system_prompt, task, memory, budget, context=()):
+    """System prompt, context sections, memory window and task, fitted into budget prompt tokens.
+
+    Memory gets what the fixed parts leave (capped at MEMORY_TOKEN_BUDGET). If the fixed parts alone
+    overflow, context sections are dropped from the last one, then the task is truncated.
+    """
+    system = SystemMessage(content=system_prompt)
+    context = [SystemMessage(content=section) for section in context if section]
+    fixed = estimate_message_tokens([system, HumanMessage(content=task)])
+    while context and fixed + estimate_message_tokens(context) > budget:
+        context.pop()
+    if fixed > budget:
+        # Leave the per-message overhead of both messages out of the room for the task itself
+        task = truncate_to_tokens(task, budget - estimate_message_tokens([system, HumanMessage(content="")]))
+        fixed = estimate_message_tokens([system, HumanMessage(content=task)])
+    remaining = budget - fixed - estimate_message_tokens(context)
+    history = memory.window(min(remaining, MEMORY_TOKEN_BUDGET)) if remaining > 0 else []
+    return [system, *context, *history, HumanMessage(content=task)]
+
+def split_replies(response, names):
+    """Split a batched reply into {name: paragraph} by the 'Name:' lines that open each unit's part, allowing the
+    markdown models wrap them in ('**Name:**', '- Name:', '1. Name:', '### Name:'). Units the reply never names get the whole response."""
+    alternatives = "|".join(re.escape(name) for name in names)
+    pattern = re.compile(r"^\s*(?:(?:[-+*>#]+|\d+[.)])\s+)*[*_]*(" + alternatives + r")[*_]*\s*:[*_]*", re.MULTILINE)
+    matches = list(pattern.finditer(response or ""))
+    replies = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(response)
+        replies.setdefault(match.group(1), response[match.end():end].strip())
+    return {name: replies.get(name, response) for name in names}
\ No newline at end of file
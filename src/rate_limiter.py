@@ -0,0 +1,162 @@
+import heapq
+import itertools
+import re
+import threading
+import time
+from config.settings import REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE, DELAY_BETWEEN_CALLS
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def parse_duration(value):
+    """Parse rate limit header durations such as '2', '7.66s' or '2m59.56s' into seconds."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def time_until(self, amount, now):
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0
+        return (amount - self.level) / self.refill_per_second
+
+    def consume(self, amount, now):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def refund(self, amount, now):
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+    def clamp(self, level, now):
+        self._refill(now)
+        self.level = min(self.level, level)
+
+class RateLimiter:
+    """Process-wide scheduler for LLM calls.
+
+    Callers wait in priority lanes (lower value first, FIFO within a lane) until both the
+    request and the token bucket can cover the call. 429 responses push the whole
+    scheduler back by the provider's retry hint.
+    """
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE, min_interval=DELAY_BETWEEN_CALLS):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self.min_interval = min_interval
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._blocked_until = 0
+        self._last_grant = 0
+
+    def acquire(self, tokens=1, priority=PRIORITY_NORMAL):
+        """Block until the call may start; returns the seconds spent waiting."""
+        start = time.monotonic()
+        ticket = (priority, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._waiting[0] == ticket:
+                        wait = max(
+                            self._blocked_until - now,
+                            self._last_grant + self.min_interval - now,
+                            self.requests.time_until(1, now),
+                            self.tokens.time_until(tokens, now),
+                        )
+                        if wait <= 0:
+                            self.requests.consume(1, now)
+                            self.tokens.consume(tokens, now)
+                            self._last_grant = now
+                            return now - start
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def record_usage(self, reserved_tokens, used_tokens):
+        """Settle a reservation against the tokens the provider actually billed."""
+        with self._cond:
+            now = time.monotonic()
+            if used_tokens < reserved_tokens:
+                self.tokens.refund(reserved_tokens - used_tokens, now)
+            else:
+                self.tokens.consume(used_tokens - reserved_tokens, now)
+            self._cond.notify_all()
+
+    def backoff(self, seconds):
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def update_from_headers(self, headers):
+        """Sync the buckets with x-ratelimit-* headers and honour retry-after."""
+        if not headers:
+            return
+        with self._cond:
+            now = time.monotonic()
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            if remaining_requests is not None:
+                self.requests.clamp(float(remaining_requests), now)
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_tokens is not None:
+                self.tokens.clamp(float(remaining_tokens), now)
+            retry_after = parse_duration(headers.get("retry-after"))
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            self._cond.notify_all()
+
+    def on_rate_limited(self, headers, default_backoff=1.0):
+        """Handle a 429: back off by retry-after, or until the exhausted bucket resets."""
+        headers = headers or {}
+        delay = parse_duration(headers.get("retry-after"))
+        if not delay:
+            resets = [parse_duration(headers.get(f"x-ratelimit-reset-{kind}")) for kind in ("requests", "tokens")
+                      if headers.get(f"x-ratelimit-remaining-{kind}") == "0"]
+            delay = max([reset for reset in resets if reset], default=default_backoff)
+        self.backoff(delay)
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
+
+def configure_rate_limiter(share=1):
+    """Replace this process's limiter with one allowed share of the account quota, for processes that split it between them."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        _rate_limiter = RateLimiter(REQUESTS_PER_MINUTE * share, TOKENS_PER_MINUTE * share, DELAY_BETWEEN_CALLS / share)
+        return _rate_limiter
\ No newline at end of file
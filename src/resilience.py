@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+import httpx
+from groq import APIConnectionError, APIStatusError, APITimeoutError
+from config.settings import (LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT, LLM_MAX_CONNECTIONS, LLM_KEEPALIVE_CONNECTIONS, LLM_KEEPALIVE_EXPIRY,
+                             LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+
+# Status codes worth retrying: request timeout, conflict and anything the server blames on itself
+TRANSIENT_STATUS_CODES = {408, 409, 500, 502, 503, 504}
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a model whose circuit breaker is open."""
+
+def http_timeout(read=LLM_READ_TIMEOUT):
+    return httpx.Timeout(connect=LLM_CONNECT_TIMEOUT, read=read, write=LLM_READ_TIMEOUT, pool=LLM_CONNECT_TIMEOUT)
+
+def _limits():
+    return httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=LLM_KEEPALIVE_EXPIRY)
+
+_http_client = None
+_async_http_client = None
+_http_lock = threading.Lock()
+
+def get_http_client():
+    """Process-wide pooled client, so every GroqLLM reuses warm keep-alive connections."""
+    global _http_client
+    with _http_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(timeout=http_timeout(), limits=_limits())
+        return _http_client
+
+def get_async_http_client():
+    """Async counterpart of get_http_client; only use it from the shared loop in src.async_runner."""
+    global _async_http_client
+    with _http_lock:
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(timeout=http_timeout(), limits=_limits())
+        return _async_http_client
+
+def is_transient(error):
+    """Connection drops, timeouts and 5xx responses; rate limits are handled by the rate limiter instead."""
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in TRANSIENT_STATUS_CODES
+
+def is_client_error(error):
+    """4xx responses other than rate limits and the transient codes: the request itself is at fault, so no model would take it."""
+    return (isinstance(error, APIStatusError) and 400 <= error.status_code < 500
+            and error.status_code != 429 and error.status_code not in TRANSIENT_STATUS_CODES)
+
+def retry_delay(attempt, base=LLM_RETRY_BASE_DELAY, cap=LLM_RETRY_MAX_DELAY):
+    """Full-jitter exponential backoff, so agents that failed together don't retry together."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class CircuitBreaker:
+    """Stops calling a model after repeated failures, then lets a single trial call through after a cool-down.
+
+    closed: calls pass. open: calls are refused until reset_timeout has passed. half-open: one trial
+    call passes; success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Whether a call may go ahead now; in half-open state only the first caller gets through."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release(self):
+        """End a call that says nothing about the model's health, freeing the half-open trial slot."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(name):
+    """One breaker per model, shared by every client in the process."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker()
+        return _breakers[name]
\ No newline at end of file
@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.random_projection import SparseRandomProjection
+from config.settings import RETRIEVAL_INDEX_DIR, RETRIEVAL_FEATURES, RETRIEVAL_DIMENSIONS, RETRIEVAL_TOP_K, RETRIEVAL_MIN_SCORE
+from src.knowledge_base import get_knowledge_base
+
+INDEX_VERSION = 1
+_ROW_DTYPE = np.dtype([("response_id", "<i8"), ("role", "<i2"), ("disaster_type", "<i2")])
+
+def agent_role(agent_name):
+    """'Rescue-1' and 'Rescue-2' share the role 'Rescue'."""
+    return agent_name.rsplit("-", 1)[0]
+
+class MissionRetriever:
+    """Nearest-neighbour index over past agent responses in the knowledge base.
+
+    Texts are hashed (no vocabulary to fit) and projected to a small dense embedding, so new
+    responses are appended without touching existing rows. Embeddings live in a memory-mapped
+    file next to a small JSON header, so startup maps the index instead of rebuilding it.
+    """
+
+    def __init__(self, knowledge_base=None, index_dir=RETRIEVAL_INDEX_DIR, n_features=RETRIEVAL_FEATURES, dimensions=RETRIEVAL_DIMENSIONS):
+        self.knowledge_base = knowledge_base or get_knowledge_base()
+        self.index_dir = index_dir
+        self.vectors_path = os.path.join(index_dir, "vectors.f32")
+        self.rows_path = os.path.join(index_dir, "rows.bin")
+        self.header_path = os.path.join(index_dir, "index.json")
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, norm="l2", ngram_range=(1, 2), stop_words="english")
+        # Fixed seed: the projection must be identical in every process that reads the index
+        self.projection = SparseRandomProjection(n_components=dimensions, random_state=0).fit(np.zeros((1, n_features), dtype=np.float32))
+        self.header = {"version": INDEX_VERSION, "n_features": n_features, "dimensions": dimensions, "count": 0, "last_response_id": 0,
+                       "roles": [], "disaster_types": []}
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._rows = None
+        os.makedirs(index_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.header_path):
+            with open(self.header_path, encoding="utf-8") as f:
+                header = json.load(f)
+            if all(header.get(key) == self.header[key] for key in ("version", "n_features", "dimensions")):
+                self.header = header
+            else:
+                # Settings changed since the index was built; start over
+                for path in (self.vectors_path, self.rows_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+        self._map()
+
+    def _map(self):
+        count = self.header["count"]
+        if count:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.header["dimensions"]))
+            self._rows = np.memmap(self.rows_path, dtype=_ROW_DTYPE, mode="r", shape=(count,))
+        else:
+            self._vectors, self._rows = None, None
+
+    def _code(self, table, value):
+        values = self.header[table]
+        if value not in values:
+            values.append(value)
+        return values.index(value)
+
+    def embed(self, texts):
+        embedded = self.projection.transform(self.vectorizer.transform(texts))
+        embedded = np.asarray(embedded.todense() if hasattr(embedded, "todense") else embedded, dtype=np.float32)
+        norms = np.linalg.norm(embedded, axis=1, keepdims=True)
+        return embedded / np.where(norms == 0, 1, norms)
+
+    def _truncate(self):
+        """Cut both data files back to the header's count, dropping rows a crashed refresh appended but never recorded."""
+        count = self.header["count"]
+        for path, size in ((self.vectors_path, count * self.header["dimensions"] * np.dtype(np.float32).itemsize),
+                           (self.rows_path, count * _ROW_DTYPE.itemsize)):
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def refresh(self, batch_size=500):
+        """Append embeddings for knowledge base responses added since the last refresh; returns how many were added."""
+        added = 0
+        with self._lock:
+            while True:
+                responses = self.knowledge_base.responses_after(self.header["last_response_id"], limit=batch_size)
+                if not responses:
+                    break
+                if not added:
+                    self._truncate()
+                vectors = self.embed([response["message"] for response in responses])
+                rows = np.array([(response["id"], self._code("roles", agent_role(response["agent"])), self._code("disaster_types", response["disaster_type"]))
+                                 for response in responses], dtype=_ROW_DTYPE)
+                with open(self.vectors_path, "ab") as f:
+                    vectors.tofile(f)
+                with open(self.rows_path, "ab") as f:
+                    rows.tofile(f)
+                self.header["count"] += len(responses)
+                self.header["last_response_id"] = responses[-1]["id"]
+                added += len(responses)
+            if added:
+                # Header is written after the data, so a crash mid-refresh leaves bytes past count that the next refresh cuts off
+                with open(self.header_path, "w", encoding="utf-8") as f:
+                    json.dump(self.header, f)
+                self._map()
+        return added
+
+    def search(self, query, k=RETRIEVAL_TOP_K, role=None, disaster_type=None, min_score=RETRIEVAL_MIN_SCORE):
+        """Top-k past responses most similar to query, as dicts with score, agent, disaster_type and message."""
+        self.refresh()
+        with self._lock:
+            if self._vectors is None:
+                return []
+            scores = np.asarray(self._vectors @ self.embed([query])[0])
+            mask = scores >= min_score
+            if role is not None:
+                mask &= self._rows["role"] == (self.header["roles"].index(role) if role in self.header["roles"] else -1)
+            if disaster_type is not None:
+                mask &= self._rows["disaster_type"] == (self.header["disaster_types"].index(disaster_type) if disaster_type in self.header["disaster_types"] else -1)
+            candidates = np.flatnonzero(mask)
+            if candidates.size == 0:
+                return []
+            top = candidates[np.argsort(-scores[candidates])[:k]]
+            hits = [(int(self._rows["response_id"][i]), float(scores[i])) for i in top]
+        messages = {row["id"]: row for row in self.knowledge_base.responses_by_ids([response_id for response_id, _ in hits])}
+        return [{"score": score, **messages[response_id]} for response_id, score in hits if response_id in messages]
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+def get_retriever():
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = MissionRetriever()
+        return _retriever
\ No newline at end of file
@@ -0,0 +1,126 @@
+import heapq
+from collections import OrderedDict
+from config.settings import ROUTE_CACHE_SIZE, ROUTE_MINUTES_PER_CELL, ROUTE_MAX_WAYPOINTS
+from src.spatial import manhattan
+
+class RoutePlanner:
+    """A* paths over the environment grid with blocked cells impassable.
+
+    Recent paths sit in an LRU cache. apply_delta() keeps it consistent with the environment
+    step by step: paths crossing newly blocked cells are dropped, and when routes clear only
+    detours (and failed searches) are dropped, since a path that is already Manhattan-shortest
+    cannot improve.
+    """
+
+    def __init__(self, env, cache_size=ROUTE_CACHE_SIZE, minutes_per_cell=ROUTE_MINUTES_PER_CELL):
+        self.env = env
+        self.cache_size = cache_size
+        self.minutes_per_cell = minutes_per_cell
+        self.cache = OrderedDict()
+        self._blocked = None
+        self._blocked_source = None
+        self.hits = 0
+        self.misses = 0
+
+    def find_path(self, start, goal):
+        """List of cells from start to goal inclusive, or None if blocked routes cut it off."""
+        start, goal = (int(start[0]), int(start[1])), (int(goal[0]), int(goal[1]))
+        key = (start, goal)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return self.cache[key]
+        self.misses += 1
+        path = self._search(start, goal)
+        self.cache[key] = path
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return path
+
+    def _blocked_cells(self):
+        # Flat Python list of the blocked grid, rebuilt only when the environment reports changes
+        if self._blocked is None or self._blocked_source is not self.env.blocked:
+            self._blocked_source = self.env.blocked
+            self._blocked = self.env.blocked.ravel().tolist()
+        return self._blocked
+
+    def _search(self, start, goal):
+        blocked = self._blocked_cells()
+        size = self.env.size
+        goal_id = goal[0] * size + goal[1]
+        start_id = start[0] * size + start[1]
+        gx, gy = goal
+        # Ties on f prefer the deeper node, which keeps A* from flooding open ground
+        frontier = [(manhattan(start, goal), 0, start_id)]
+        came_from = {start_id: None}
+        cost = {start_id: 0}
+        while frontier:
+            _, g, cell = heapq.heappop(frontier)
+            g = -g
+            if cell == goal_id:
+                path = []
+                while cell is not None:
+                    path.append(divmod(cell, size))
+                    cell = came_from[cell]
+                return path[::-1]
+            if g > cost[cell]:
+                continue
+            x, y = divmod(cell, size)
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if not (0 <= nx < size and 0 <= ny < size):
+                    continue
+                nxt = nx * size + ny
+                # Start and goal may themselves be blocked: agents travel to blockages to clear them
+                if blocked[nxt] and nxt != goal_id:
+                    continue
+                if nxt not in cost or g + 1 < cost[nxt]:
+                    cost[nxt] = g + 1
+                    came_from[nxt] = cell
+                    heapq.heappush(frontier, (g + 1 + abs(nx - gx) + abs(ny - gy), -(g + 1), nxt))
+        return None
+
+    def apply_delta(self, delta):
+        newly_blocked = set(delta.get("newly_blocked", ()))
+        cleared = bool(delta.get("cleared_routes"))
+        if not newly_blocked and not cleared:
+            return
+        self._blocked = None
+        for key, path in list(self.cache.items()):
+            if path is None:
+                stale = cleared
+            else:
+                stale = (newly_blocked and any(cell in newly_blocked for cell in path[1:-1])) or (cleared and len(path) - 1 > manhattan(*key))
+            if stale:
+                del self.cache[key]
+
+    def eta(self, path):
+        return (len(path) - 1) * self.minutes_per_cell
+
+    def describe(self, start, goal):
+        """Short route briefing for prompts: distance, ETA and turning points."""
+        path = self.find_path(start, goal)
+        if path is None:
+            return f"No open route from {tuple(start[:2])} to {tuple(goal[:2])}; blocked routes must be cleared first."
+        if len(path) == 1:
+            return f"Already at {path[0]}."
+        waypoints = [path[0]] + [path[i] for i in range(1, len(path) - 1)
+                                 if (path[i][0] - path[i - 1][0], path[i][1] - path[i - 1][1]) != (path[i + 1][0] - path[i][0], path[i + 1][1] - path[i][1])] + [path[-1]]
+        if len(waypoints) > ROUTE_MAX_WAYPOINTS:
+            waypoints = waypoints[:ROUTE_MAX_WAYPOINTS - 1] + ["..."] + [waypoints[-1]]
+        via = " -> ".join(str(point) for point in waypoints)
+        return f"{len(path) - 1} cells, ETA {self.eta(path):.0f} min via {via}"
+
+    def snapshot(self):
+        """Cached paths in LRU order, for checkpoints (see src.checkpoint)."""
+        return {"cache": list(self.cache.items()), "hits": self.hits, "misses": self.misses}
+
+    @classmethod
+    def from_snapshot(cls, env, state):
+        planner = cls(env)
+        planner.cache.update(state["cache"])
+        planner.hits = state["hits"]
+        planner.misses = state["misses"]
+        return planner
+
+    def stats(self):
+        return {"cached_paths": len(self.cache), "hits": self.hits, "misses": self.misses}
\ No newline at end of file
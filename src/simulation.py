@@ -1,134 +1,403 @@
-from src.agents import get_agents
+from src.agents import get_fleet, restore_fleet
+from src.checkpoint import mission_state, save_checkpoint, load_checkpoint, checkpoint_path, mission_lock
 from src.environment import DisasterEnvironment
+from src.spatial import TaskAssigner
+from src.routing import RoutePlanner
+from src.events import apply_event, next_entry_id, SystemNotice, AgentStarted, TokenReceived, AgentFinished, AgentFailed, BatteryChanged, MissionDone
+from src.instrumentation import tracer
+from src.fleet import ACTIVE
+from src.messaging import MessageRouter, PLAN_TOPIC, ROLE_TOPICS
+from src.prompts import encode_cells, strip_reasoning, truncate_to_tokens, split_replies
+from src.tokens import estimate_tokens
+from config.settings import (PARALLEL_AGENTS, MAX_PARALLEL_AGENTS, STREAM_RESPONSES, SIMULATION_STEPS, DELAY_BETWEEN_STEPS, GRID_SIZE, AGENT_INBOX_SIZE,
+                             PLAN_BROADCAST_TOKENS, MESSAGE_ROUNDS_PER_STEP, DRONE_DETECTION_RADIUS, DRONE_SURVEYS_PER_STEP, FLEET_BATCH_TOKENS)
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import replace
+import numpy as np
+import contextvars
+import threading
 import time
 import random
 
-def run_disaster_simulation(steps=1, ui_mode=False, chat_log=None, agent_status=None, flowchart=None):
+def run_agent_task(agent, label, task, emit, to_agent="Controller", move_to=None, stream=False):
+    """Run one agent task and report it through emit. Returns the response, or None if the task failed."""
+    entry_id = next_entry_id() if stream else None
+    emit(AgentStarted(agent.name, label, entry_id))
+    try:
+        with tracer.span("agent", agent.name, task=label):
+            if stream:
+                response = agent.perform_task(task, on_token=lambda token: emit(TokenReceived(agent.name, entry_id, token)))
+            else:
+                response = agent.perform_task(task)
+    except Exception as e:
+        # One agent's failed call costs its task for this step, not the mission
+        emit(AgentFailed(agent.name, f"{agent.name} task failed: {e}", entry_id))
+        return None
+    if move_to is not None:
+        agent.update_location(move_to)
+    emit(AgentFinished(agent.name, label, response, to_agent, entry_id))
+    return response
+
+# Standing instruction per work topic; each agent's task adds its target and route
+TOPIC_INSTRUCTIONS = {
+    "blockage": "See what are the affected areas and work on clearing the routes.",
+    "survey": "You are a drone and your task is to make it easier to access areas that are challenging for people to reach, so report views of disaster zones.",
+    "assess": "your task is to assess the area and tell any important information.",
+    "victim": "Your task is to understand which victims need to be rescued and understand the situation and rescure.",
+    "supply_need": "Your task is to deliver the items.",
+    "casualty": "You have a gorup of doctors and you are supposed to treat injured victims.",
+}
+
+def is_stale(message, env, step):
+    """Work that no longer needs doing. The Controller raises its demand afresh every step, so older requests are dropped."""
+    if message.topic == "victim":
+        return bool(env.rescued[message.target[0], message.target[1]])
+    if message.topic == "casualty":
+        return False
+    return message.step < step
+
+def task_for(agent, message, env, planner):
+    """(label, details, move_to) for a work message, details being what task_text adds to the topic's instruction."""
+    target = message.target
+    if message.topic == "blockage":
+        return f"Clear routes: {message.body}", f"Blocked routes: {message.body}\nNearest blockage {target}, route: {planner.describe(agent.location, target)}", target
+    if message.topic == "survey":
+        return f"Survey {target}", f"Survey {target}.", target
+    if message.topic == "assess":
+        return f"Assess {target}", f"Assess {target}. Route: {planner.describe(agent.location, target)}", target
+    if message.topic == "victim":
+        return f"Rescue at {target}", f"{message.sender} reported: {message.body}. Rescue at {target}. Route: {planner.describe(agent.location, target)}", target
+    if message.topic == "supply_need":
+        return f"Deliver to {target}", f"Deliver to {target}. Route: {planner.describe(agent.location, target)}", (target[0], target[1])
+    if message.topic == "casualty":
+        return f"Treat at {target}", f"{message.sender} reported: {message.body}. Treat at {target}. Route: {planner.describe(agent.location, target)}", target
+    raise ValueError(f"No task for topic {message.topic!r}")
+
+def task_text(topic, situation, details):
+    """The full task for one agent: the topic's instruction, the situation where the topic needs it, then details."""
+    if topic == "blockage":
+        return f"{TOPIC_INSTRUCTIONS[topic]}\n{situation}\n{details}"
+    return f"{TOPIC_INSTRUCTIONS[topic]} {details}"
+
+def batch_text(batch, situation):
+    """One prompt briefing every unit in a batch; the reply is split back per unit by split_replies."""
+    units = "\n".join(f"{agent.name}: {details}" for agent, _, _, details, _ in batch)
+    return (f"{task_text(batch[0][1].topic, situation, '').rstrip()}\n"
+            f"You are briefing {len(batch)} units of your team at once. Answer with one short paragraph per unit, starting with its name and a colon.\n{units}")
+
+def make_batches(jobs, budget=FLEET_BATCH_TOKENS):
+    """Split one role's jobs into batches whose task details fit in budget tokens; every batch has at least one job."""
+    batches, batch, used = [], [], 0
+    for job in jobs:
+        cost = estimate_tokens(job[3])
+        if batch and used + cost > budget:
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(job)
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+def run_batch(batch, situation, emit, stream=False):
+    """Run (agent, message, label, details, move_to) jobs for agents of one role as a single LLM call made by the first agent.
+    Returns each agent's response, or None where its task failed; if the lead goes down before the call, the next member leads.
+    Batched calls don't stream, since the reply is only split per unit once it is complete; stream applies to single jobs."""
+    if len(batch) == 1:
+        agent, message, label, details, move_to = batch[0]
+        return [run_agent_task(agent, label, task_text(message.topic, situation, details), emit, move_to=move_to, stream=stream)]
+    for agent, _, label, _, _ in batch:
+        emit(AgentStarted(agent.name, label))
+    failed = []
+    while batch:
+        lead = batch[0][0]
+        try:
+            with tracer.span("agent", lead.name, task=f"{len(batch)} units", batch=len(batch)):
+                response = lead.perform_task(batch_text(batch, situation))
+        except Exception as e:
+            for agent, *_ in batch:
+                emit(AgentFailed(agent.name, f"{agent.name} task failed: {e}"))
+            return failed + [None] * len(batch)
+        if lead.status == "active":
+            break
+        # The lead went down before making the call, so the response is its abort notice; the next member leads instead
+        emit(AgentFailed(lead.name, response))
+        failed.append(None)
+        batch = batch[1:]
+    if not batch:
+        return failed
+    replies = split_replies(response, [agent.name for agent, *_ in batch])
+    responses = failed
+    for agent, _, label, _, move_to in batch:
+        reply = replies[agent.name] if agent is lead else agent.take_reply(replies[agent.name])
+        if agent.status != "active":
+            emit(AgentFailed(agent.name, reply))
+            responses.append(None)
+            continue
+        agent.update_location(move_to)
+        emit(AgentFinished(agent.name, label, reply))
+        responses.append(reply)
+    return responses
+
+def run_batches(batches, situation, emit, parallel=False, stream=False):
+    """Run every batch and return the responses flattened in job order."""
+    if parallel:
+        # Fan out: each batch blocks on its own LLM round trip, so threads overlap the waits.
+        # Each batch runs in a copy of this context so its agent span nests under the step span.
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_AGENTS, len(batches)) or 1) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, run_batch, batch, situation, emit, stream=stream) for batch in batches]
+            return [response for future in futures for response in future.result()]
+    return [response for batch in batches for response in run_batch(batch, situation, emit, stream=stream)]
+
+def react(agent, message, env, step, reported):
+    """Record a finished task and publish what it sets off: drone detections call in Rescue, and rescued victims go to Medical.
+    reported holds the (topic, target) pairs already published this step, so overlapping surveys call in each victim once."""
+    def publish(topic, body, target):
+        if (topic, target) not in reported:
+            reported.add((topic, target))
+            agent.publish(topic, body, target=target, step=step)
+
+    if message.topic == "survey":
+        for victim in env.survey(message.target, DRONE_DETECTION_RADIUS):
+            publish("victim", f"Victim spotted at {victim}", victim)
+    elif message.topic == "victim":
+        env.mark_rescued(message.target)
+        publish("casualty", f"Victim extracted at {message.target}, needs treatment", message.target)
+    elif message.topic == "supply_need":
+        env.mark_supplied(message.target)
+
+def format_situation(summary, delta):
+    """Compact per-step briefing: running totals plus only what changed since the last step."""
+    bounds = summary["affected_bounds"]
+    lines = [
+        f"Situation: {summary['affected']} affected cells" + (f" within [{bounds[0][0]}-{bounds[1][0]},{bounds[0][1]}-{bounds[1][1]}]" if bounds else "")
+        + f", {summary['blocked']} blocked routes, {summary['open_victims']} victims awaiting rescue ({summary['rescued']} rescued),"
+        + f" {summary['open_supply_needs']} open supply needs ({summary['supplied']} supplied).",
+    ]
+    changes = [
+        ("Newly affected", delta["newly_affected"]),
+        ("Newly blocked", delta["newly_blocked"]),
+        ("Routes cleared", delta["cleared_routes"]),
+        ("New victims", delta["new_victims"]),
+        ("Newly rescued", delta["newly_rescued"]),
+        ("New supply needs", delta["new_supply_needs"]),
+    ]
+    lines.extend(f"{title}: {encode_cells(cells)}" for title, cells in changes if cells)
+    if len(lines) == 1:
+        lines.append("No changes since the last step.")
+    return "\n".join(lines)
+
+def run_disaster_simulation(steps=None, ui_mode=False, chat_log=None, agent_status=None, flowchart=None, parallel=None, stream=None, backend=None, llm=None,
+                            seed=None, disaster_type=None, grid_size=None, step_delay=None, stats=None, events=None, retrieval=None,
+                            checkpoint_dir=None, resume_from=None, fleet_sizes=None):
+    """Run one mission. Pass seed/disaster_type/grid_size to fix the scenario, a dict as stats to collect run metrics
+    (stats["trace_id"] then selects the mission's spans in src.instrumentation.tracer),
+    an event publisher (see src.events) to stream progress to a UI session, retrieval=False to keep
+    past missions out of the prompts, and fleet_sizes ({role: count}) to override FLEET_SIZES.
+
+    With checkpoint_dir set, the mission state is saved there after setup and after every step. resume_from
+    (a checkpoint path or a loaded/forked state, see src.checkpoint) continues a mission after its last saved
+    step; chat_log, agent_status and flowchart, if passed, are refilled from the checkpoint."""
+    resumed = load_checkpoint(resume_from) if isinstance(resume_from, str) else resume_from
+    if resumed is not None:
+        random.setstate(resumed["random"])
+        fleet = restore_fleet(resumed["fleet"], llm=llm, backend=backend, retrieval=retrieval)
+    else:
+        if seed is not None:
+            random.seed(seed)
+        fleet = get_fleet(fleet_sizes, llm=llm, backend=backend, retrieval=retrieval)
     if chat_log is None:
         chat_log = []
     if agent_status is None:
-        agents = get_agents()
-        agent_status = {agent.name: {"active": False, "message": "", "battery": 100, "task": "", "completed": False} for agent in agents.values()}
-    else:
-        agents = get_agents()
+        agent_status = {agent.name: {"active": False, "message": "", "battery": agent.battery, "task": "", "completed": False} for agent in fleet}
     if flowchart is None:
         flowchart = []
+    if resumed is not None:
+        chat_log[:] = resumed["chat_log"]
+        agent_status.clear()
+        agent_status.update(resumed["agent_status"])
+        flowchart[:] = resumed["flowchart"]
+    if parallel is None:
+        parallel = PARALLEL_AGENTS
+    if stream is None:
+        stream = STREAM_RESPONSES
+    if steps is None:
+        steps = resumed["steps"] if resumed is not None else SIMULATION_STEPS
+    if step_delay is None:
+        step_delay = DELAY_BETWEEN_STEPS
+    if stats is None:
+        stats = {}
+    if resumed is not None:
+        stats.update(resumed["stats"])
+    else:
+        stats.update({"failures": 0, "depleted": 0, "tasks": 0, "task_errors": 0, "idle": 0, "messages": 0, "step_latency": []})
+    start_step = resumed["step"] if resumed is not None else 0
+    if resumed is not None:
+        router = MessageRouter.from_snapshot(resumed["router"])
+    else:
+        # Every agent reads the plan; work goes to one shared queue per role, sized to the role's fleet
+        router = MessageRouter()
+        for agent in fleet:
+            router.register(agent.name, () if agent is fleet.controller else (PLAN_TOPIC,))
+        for role in fleet.role_names():
+            router.register(role, ROLE_TOPICS[role], inbox_size=AGENT_INBOX_SIZE * max(fleet.sizes[role], 1))
+    for agent in fleet:
+        agent.router = router
+
+    # Every state change goes through emit: applied to this run's own structures and forwarded to subscribers
+    emit_lock = threading.Lock()
+
+    def emit(event):
+        with emit_lock:
+            apply_event(event, chat_log, agent_status, flowchart)
+        if events is not None:
+            events.publish(event)
+
+    # The lock keeps other sessions from resuming this mission while it runs
+    with mission_lock(checkpoint_dir) if checkpoint_dir is not None else nullcontext(), \
+            tracer.span("mission", "mission", seed=seed, parallel=parallel, stream=stream) as mission_span:
+        def checkpoint(step):
+            if checkpoint_dir is not None:
+                with tracer.span("checkpoint", f"step {step}", step=step):
+                    save_checkpoint(mission_state(step, steps, env, planner, fleet, router, stats, chat_log, agent_status, flowchart),
+                                    checkpoint_path(checkpoint_dir, step))
+
+        if resumed is not None:
+            env = DisasterEnvironment.from_snapshot(resumed["env"])
+            # Cached routes come back too: a fresh search may pick a different route of the same length
+            planner = RoutePlanner.from_snapshot(env, resumed["routes"])
+            emit(SystemNotice(f"Resuming {env.disaster_type} mission after step {start_step}/{steps}"))
+        else:
+            env = DisasterEnvironment(size=grid_size or GRID_SIZE, seed=seed, disaster_type=disaster_type)
+            planner = RoutePlanner(env)
+            initial_message = f"Disaster Type: {env.disaster_type} | Affected Areas: {len(env.affected_areas)}"
+            emit(SystemNotice(initial_message))
+            checkpoint(0)
+        disaster_type = env.disaster_type
+
+        for step in range(start_step + 1, steps + 1):
+            if step > start_step + 1:
+                with tracer.span("throttle", "step delay"):
+                    time.sleep(step_delay)
+            step_start = time.perf_counter()
+            with tracer.span("step", f"step {step}", step=step):
+                emit(SystemNotice(f"Step {step}/{steps}: Controller starting..."))
+                env.update_environment()
+                env_data = env.get_report()
+                delta = env.get_delta()
+                situation = format_situation(env.get_summary(), delta)
+                planner.apply_delta(delta)
+
+                # Random device failure, drawn for the whole fleet at once from the seeded random module
+                rng = np.random.default_rng(random.getrandbits(64))
+                for slot in fleet.fail(0.1, rng):  # 10% chance of failure
+                    agent = fleet.agents[slot]
+                    stats["failures"] += 1
+                    emit(BatteryChanged(agent.name, 0))
+                    emit(AgentFailed(agent.name, f"{agent.name} failed unexpectedly!"))
+                for agent in fleet.promote_standby():
+                    emit(SystemNotice(f"{agent.name} joins from standby"))
+                working = fleet.status == ACTIVE
+
+                # Controller plans first and broadcasts the plan, which every agent reads before its next task
+                controller = fleet.controller
+                controller_task = f"Come up with a rescue plan and Coordinate for {env.disaster_type} (step {step} of {steps}).\n{situation}\nwhen you hae finished the communicated stop and wait for further instructions if needed."
+                plan = run_agent_task(controller, "Coordinate response", controller_task, emit, to_agent="All", stream=stream)
+                if plan is None:
+                    stats["task_errors"] += 1
+                elif controller.status == "active":
+                    # An inactive Controller's reply is its abort notice, not a plan
+                    controller.publish(PLAN_TOPIC, truncate_to_tokens(strip_reasoning(plan), PLAN_BROADCAST_TOKENS), step=step)
+                stats["tasks"] += 1
+
+                # The Controller raises this step's demand on topics, at most one target per available agent of the role;
+                # victims reach Rescue only through drone detections. Targets are the nearest unclaimed cells each agent covers.
+                assigner = TaskAssigner(env_data)
+
+                def raise_demand(role, topic, describe):
+                    for slot in fleet.available(role):
+                        target = assigner.assign(fleet.agents[slot])
+                        if target is None:
+                            break
+                        controller.publish(topic, describe(target), target=target, step=step)
+
+                raise_demand("routes", "blockage", lambda target: encode_cells(env_data["blocked_routes"]))
+                # Drones look where no drone has looked yet, and only go back over old ground once everything is covered
+                survey_areas = []
+                for slot in fleet.available("drone"):
+                    for _ in range(DRONE_SURVEYS_PER_STEP):
+                        area = assigner.indexes["areas"].nearest(fleet.agents[slot].location, lambda cell: not env.surveyed[cell])
+                        if area is None:
+                            break
+                        assigner.claim("areas", area)
+                        survey_areas.append(area)
+                for area in survey_areas:
+                    controller.publish("survey", f"Survey {area}", target=area, step=step)
+                if not survey_areas:
+                    raise_demand("drone", "survey", lambda target: f"Survey {target}")
+                raise_demand("assess", "assess", lambda target: f"Assess {target}")
+                raise_demand("supplies", "supply_need", lambda target: f"Deliver to {target}")
+
+                # Agents work through their roles' queues in rounds, so a detection can be acted on within the same step.
+                # Each round the dispatcher hands queued work to the nearest free agents of the role, and each role's
+                # tasks go out as batched LLM calls, so the number of calls follows the work rather than the fleet size.
+                # Targets are claimed as they are taken off the queues, and only marked done once the task succeeds,
+                # so duplicate reports go to one agent; a failed task's claim is released and its message goes back to the role queue
+                worked, claimed, reported = set(), set(), set()
+
+                def stale_or_claimed(message):
+                    if (message.topic, message.target) in claimed or is_stale(message, env, step):
+                        return True
+                    claimed.add((message.topic, message.target))
+                    return False
+
+                for _ in range(MESSAGE_ROUNDS_PER_STEP):
+                    batches = []
+                    for role in fleet.role_names():
+                        free = fleet.available(role)
+                        messages = router.take(role, len(free), stale_or_claimed)
+                        jobs = []
+                        for message, slot in zip(messages, fleet.assign(free, [message.target for message in messages])):
+                            agent = fleet.agents[slot]
+                            agent.read_inbox()
+                            jobs.append((agent, message, *task_for(agent, message, env, planner)))
+                        batches.extend(make_batches(jobs))
+                    if not batches:
+                        break
+                    jobs = [job for batch in batches for job in batch]
+                    responses = run_batches(batches, situation, emit, parallel, stream)
+                    stats["task_errors"] += responses.count(None)
+                    stats["tasks"] += len(jobs)
+                    for (agent, message, *_), response in zip(jobs, responses):
+                        worked.add(agent.slot)
+                        if response is not None and agent.status == "active":
+                            react(agent, message, env, step, reported)
+                        else:
+                            claimed.discard((message.topic, message.target))
+                            router.send(replace(message, recipient=fleet.roles[agent.slot]))
+                workers = working & (np.array(fleet.roles) != "controller")
+                workers[list(worked)] = False
+                stats["idle"] += int(workers.sum())
+
+                # Agents that sat the step out still drain their batteries; working agents paid per task
+                fleet.discharge(np.flatnonzero(workers), 5, 15, rng)
+                for slot in np.flatnonzero(working):
+                    emit(BatteryChanged(fleet.agents[slot].name, fleet.agents[slot].battery))
+                for slot in np.flatnonzero(working & (fleet.battery == 0)):
+                    stats["depleted"] += 1
+                    emit(AgentFailed(fleet.agents[slot].name, f"{fleet.agents[slot].name} battery depleted!"))
+
+                stats["messages"] = router.sent
+                stats["step_latency"].append(time.perf_counter() - step_start)
+            checkpoint(step)
 
-    env = DisasterEnvironment()
-    disaster_type = env.disaster_type
-    initial_message = f"Disaster Type: {env.disaster_type} | Affected Areas: {len(env.affected_areas)}"
-    chat_log.append({"sender": "System", "message": initial_message})
-
-    #Below line controls the number of steps
-    #for step in range(steps):
-    for step in range(1,2):
-        chat_log.append({"sender": "System", "message": f"Controller starting..."})
-        env.update_environment()
-        env_data = env.get_report()
-
-        # Random device failure
-        for agent in agents.values():
-            if random.random() < 0.1 and agent.status == "active":  # 10% chance of failure
-                agent.status = "inactive"
-                agent_status[agent.name]["battery"] = 0
-                chat_log.append({"sender": "System", "message": f"{agent.name} failed unexpectedly!"})
-
-        # Controller
-        agent_status["Controller"]["active"] = True
-        agent_status["Controller"]["task"] = "Coordinate response"
-        controller_task = f"Come up with a rescue plan and Coordinate for {env.disaster_type}. Areas: {env_data['affected_areas']} with agents. when you hae finished the communicated stop and wait for further instructions if needed."
-        controller_response = agents["controller"].perform_task(controller_task)
-        agent_status["Controller"]["message"] = controller_response
-        agent_status["Controller"]["completed"] = True
-        chat_log.append({"sender": "Controller", "message": controller_response})
-        flowchart.append(("Controller", "All", "Coordinate response", True))
-
-        # Routes
-        agent_status["Routes-1"]["active"] = True
-        agent_status["Routes-1"]["task"] = f"Clear routes: {env_data['blocked_routes']}"
-        routes_task = f"See what are the affected areas and work on clearing the routes. Affected Areas: {env_data['affected_areas']}. Clear routes: {env_data['blocked_routes']}"
-        routes_response = agents["routes"].perform_task(routes_task)
-        agent_status["Routes-1"]["message"] = routes_response
-        agent_status["Routes-1"]["completed"] = True
-        chat_log.append({"sender": "Routes-1", "message": routes_response})
-        flowchart.append(("Routes-1", "Controller", f"Clear routes: {env_data['blocked_routes']}", True))  # Fixed: "Routes-1" as from_agent
-
-        # Drone with random coordinates
-        if agents["drone"].status == "inactive":
-            agents["drone"] = agents["drone"].activate_backup() or agents["drone"]
-        agent_status[agents["drone"].name]["active"] = True
-        random_area = random.choice(env_data["affected_areas"]) if env_data["affected_areas"] else (random.randint(0, 100), random.randint(0, 100))
-        agent_status[agents["drone"].name]["task"] = f"Survey {random_area}"
-        drone_task = f"You are a drone and your task is to Survey {random_area}. your task is to make it easier to access areas that are challenging for people to reach, so report views of disaster zones. "
-        drone_response = agents["drone"].perform_task(drone_task)
-        agent_status[agents["drone"].name]["message"] = drone_response
-        agent_status[agents["drone"].name]["completed"] = True
-        chat_log.append({"sender": agents["drone"].name, "message": drone_response})
-        flowchart.append((agents["drone"].name, "Controller", f"Survey {random_area}", True))  # Fixed: Drone name as from_agent
-
-        # Assess
-        agent_status["Assess-1"]["active"] = True
-        random_area = random.choice(env_data["affected_areas"]) if env_data["affected_areas"] else (0, 0)
-        agent_status["Assess-1"]["task"] = f"Assess {random_area}"
-        assess_task = f"your task is to assess the area and tell any important information. Assess {random_area}"
-        assess_response = agents["assess"].perform_task(assess_task)
-        agent_status["Assess-1"]["message"] = assess_response
-        agent_status["Assess-1"]["completed"] = True
-        chat_log.append({"sender": "Assess-1", "message": assess_response})
-        flowchart.append(("Assess-1", "Controller", f"Assess {random_area}", True))  # Fixed: "Assess-1" as from_agent
-
-        # Rescue
-        if env_data["victim_locations"]:
-            agent_status["Rescue-1"]["active"] = True
-            random_victim = random.choice(env_data["victim_locations"])
-            agent_status["Rescue-1"]["task"] = f"Rescue at {random_victim}"
-            rescue_task = f"Your task is to understand which victims need to be rescued and understand the situation and rescure. Rescue at {random_victim}"
-            rescue_response = agents["rescue"].perform_task(rescue_task)
-            agents["rescue"].update_location(random_victim)
-            agent_status["Rescue-1"]["message"] = rescue_response
-            agent_status["Rescue-1"]["completed"] = True
-            chat_log.append({"sender": "Rescue-1", "message": rescue_response})
-            flowchart.append(("Rescue-1", "Controller", f"Rescue at {random_victim}", True))  # Fixed: "Rescue-1" as from_agent
-            env.completed_tasks["rescued"].append(random_victim)
-
-        # Supplies
-        if agents["supplies"].status == "inactive":
-            agents["supplies"] = agents["supplies"].activate_backup() or agents["supplies"]
-        if env_data["supply_needs"]:
-            agent_status[agents["supplies"].name]["active"] = True
-            random_need = random.choice(env_data["supply_needs"])
-            agent_status[agents["supplies"].name]["task"] = f"Deliver to {random_need}"
-            supplies_task = f"Your task is to deliver the items. mainly Deliver to {random_need}"
-            supplies_response = agents["supplies"].perform_task(supplies_task)
-            agents["supplies"].update_location((random_need[0], random_need[1]))
-            agent_status[agents["supplies"].name]["message"] = supplies_response
-            agent_status[agents["supplies"].name]["completed"] = True
-            chat_log.append({"sender": agents["supplies"].name, "message": supplies_response})
-            flowchart.append((agents["supplies"].name, "Controller", f"Deliver to {random_need}", True))  # Fixed: Supplies name as from_agent
-            env.completed_tasks["supplied"].append(random_need)
-
-        # Medical
-        if env_data["victim_locations"]:
-            agent_status["Medical-1"]["active"] = True
-            random_victim = random.choice(env_data["victim_locations"])
-            agent_status["Medical-1"]["task"] = f"Treat at {random_victim}"
-            medical_task = f"You have a gorup of doctors and you are supposed to treat injured victims. Treat at {random_victim}"
-            medical_response = agents["medical"].perform_task(medical_task)
-            agents["medical"].update_location(random_victim)
-            agent_status["Medical-1"]["message"] = medical_response
-            agent_status["Medical-1"]["completed"] = True
-            chat_log.append({"sender": "Medical-1", "message": medical_response})
-            flowchart.append(("Medical-1", "Controller", f"Treat at {random_victim}", True))  # Fixed: "Medical-1" as from_agent
-
-        # Update battery levels
-        for agent in agents.values():
-            if agent.status == "active":
-                agent_status[agent.name]["battery"] -= random.randint(5, 15)
-                if agent_status[agent.name]["battery"] <= 0:
-                    agent.status = "inactive"
-                    chat_log.append({"sender": "System", "message": f"{agent.name} battery depleted!"})
-
-        time.sleep(5)
-
-    chat_log.append({"sender": "System", "message": "Simulation complete"})
-    return "Simulation completed successfully", disaster_type
\ No newline at end of file
+        summary = env.get_summary()
+        stats.update({"disaster_type": disaster_type, "steps": steps, "grid_size": env.size, "affected": summary["affected"],
+                      "rescued": summary["rescued"], "supplied": summary["supplied"], "open_victims": summary["open_victims"]})
+        mission_span.attrs.update({"disaster_type": disaster_type, "grid_size": env.size, "steps": steps})
+    stats["trace_id"] = mission_span.trace_id
+    tracer.export_trace(mission_span.trace_id)
+    result = "Simulation completed successfully"
+    emit(MissionDone(result, disaster_type, dict(stats)))
+    return result, disaster_type
\ No newline at end of file
@@ -0,0 +1,121 @@
+from collections import defaultdict
+from config.settings import SPATIAL_BUCKET_SIZE
+
+# Which target pool each capability works on; supply capabilities also restrict the need type
+CAPABILITY_TARGETS = {
+    "victim extraction": "victims",
+    "treatment": "victims",
+    "surveillance": "areas",
+    "structural analysis": "areas",
+    "route planning": "blocked",
+    "food": "supplies",
+    "water": "supplies",
+    "medical supplies": "supplies",
+}
+SUPPLY_CAPABILITIES = {"food": "food", "water": "water", "medical supplies": "medical"}
+
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+class GridIndex:
+    """Bucket grid over items whose first two fields are (x, y), for nearest lookups with removal."""
+
+    def __init__(self, items=(), bucket_size=SPATIAL_BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.buckets = defaultdict(dict)
+        self.count = 0
+        self.bounds = None
+        for item in items:
+            self.insert(item)
+
+    def _bucket(self, location):
+        return location[0] // self.bucket_size, location[1] // self.bucket_size
+
+    def insert(self, item):
+        key = self._bucket(item)
+        if item in self.buckets[key]:
+            return
+        self.buckets[key][item] = None
+        self.count += 1
+        if self.bounds is None:
+            self.bounds = [key[0], key[0], key[1], key[1]]
+        else:
+            self.bounds = [min(self.bounds[0], key[0]), max(self.bounds[1], key[0]), min(self.bounds[2], key[1]), max(self.bounds[3], key[1])]
+
+    def remove(self, item):
+        bucket = self.buckets.get(self._bucket(item))
+        if bucket is not None and item in bucket:
+            del bucket[item]
+            self.count -= 1
+            return True
+        return False
+
+    def nearest(self, location, predicate=None):
+        """Closest item by Manhattan distance, searching outward ring by ring of buckets."""
+        if not self.count:
+            return None
+        bx, by = self._bucket(location)
+        max_ring = max(abs(bx - self.bounds[0]), abs(bx - self.bounds[1]), abs(by - self.bounds[2]), abs(by - self.bounds[3]))
+        best, best_distance = None, None
+        for ring in range(max_ring + 1):
+            for key in self._ring(bx, by, ring):
+                for item in self.buckets.get(key, ()):
+                    if predicate is not None and not predicate(item):
+                        continue
+                    distance = manhattan(location, item)
+                    if best is None or distance < best_distance:
+                        best, best_distance = item, distance
+            # Anything in a farther ring is at least ring * bucket_size + 1 away
+            if best is not None and best_distance <= ring * self.bucket_size:
+                break
+        return best
+
+    def _ring(self, bx, by, ring):
+        if ring == 0:
+            yield bx, by
+            return
+        for dx in range(-ring, ring + 1):
+            yield bx + dx, by - ring
+            yield bx + dx, by + ring
+        for dy in range(-ring + 1, ring):
+            yield bx - ring, by + dy
+            yield bx + ring, by + dy
+
+    def __len__(self):
+        return self.count
+
+class TaskAssigner:
+    """Nearest-available target assignment for one simulation step.
+
+    Targets are claimed as they are handed out, so two agents never get the same victim,
+    area or supply need in a step, and each agent only draws from pools its capabilities cover.
+    """
+
+    def __init__(self, env_data, bucket_size=SPATIAL_BUCKET_SIZE):
+        self.indexes = {
+            "victims": GridIndex(env_data["victim_locations"], bucket_size),
+            "areas": GridIndex(env_data["affected_areas"], bucket_size),
+            "supplies": GridIndex(env_data["supply_needs"], bucket_size),
+            "blocked": GridIndex(env_data["blocked_routes"], bucket_size),
+        }
+
+    def assign(self, agent):
+        for capability in agent.capabilities:
+            pool = CAPABILITY_TARGETS.get(capability)
+            if pool is None:
+                continue
+            predicate = None
+            if pool == "supplies":
+                carried = {SUPPLY_CAPABILITIES[c] for c in agent.capabilities if c in SUPPLY_CAPABILITIES}
+                predicate = lambda need: need[2] in carried
+            target = self.indexes[pool].nearest(agent.location, predicate)
+            if target is not None:
+                self.indexes[pool].remove(target)
+                return target
+        return None
+
+    def claim(self, pool, target):
+        return self.indexes[pool].remove(target)
+
+    def remaining(self, pool):
+        return len(self.indexes[pool])
\ No newline at end of file
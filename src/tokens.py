@@ -0,0 +1,19 @@
+import re
+from functools import lru_cache
+
+# Rough local estimate of a Llama-family tokenizer: common words are one token, longer words one per
+# ten letters, numbers one per three digits and every punctuation mark its own token. Plain character
+# counting undercounts coordinate-heavy text like "(12, 40)" by more than half.
+CHARS_PER_TOKEN = 4  # Average over English text, used to turn a token budget back into characters
+LETTERS_PER_TOKEN = 10
+MESSAGE_OVERHEAD_TOKENS = 4
+_PIECES = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]|_")
+
+@lru_cache(maxsize=4096)  # Memory turns and broadcast plans are re-estimated on every prompt build
+def estimate_tokens(text):
+    if not text:
+        return 0
+    return sum(1 + (len(piece) - 1) // LETTERS_PER_TOKEN for piece in _PIECES.findall(text))
+
+def estimate_message_tokens(messages):
+    return sum(estimate_tokens(msg.content) + MESSAGE_OVERHEAD_TOKENS for msg in messages)
\ No newline at end of file
@@ -0,0 +1,19 @@
+import pytest
+from src.instrumentation import tracer
+from src.mock_llm import MockLLM
+from src.simulation import run_disaster_simulation
+
+@pytest.fixture(autouse=True)
+def no_trace_export(monkeypatch):
+    monkeypatch.setattr(tracer, "export_path", None)
+
+@pytest.fixture
+def run_mission():
+    """Run a seeded, instant mock mission; returns (chat_log, stats)."""
+    def run(steps=4, **options):
+        chat_log, stats = [], {}
+        options.setdefault("disaster_type", "flood")
+        run_disaster_simulation(steps=steps, chat_log=chat_log, flowchart=[], parallel=False, stream=False, step_delay=0, stats=stats,
+                                llm=MockLLM(latency=0, jitter=0, seed=0), retrieval=False, **options)
+        return chat_log, stats
+    return run
\ No newline at end of file
@@ -0,0 +1,36 @@
+import pytest
+from config.settings import REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE
+from src import batch, rate_limiter
+
+@pytest.fixture
+def process_limiter(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_rate_limiter", None)
+
+class InlinePool:
+    """Runs the pool's initializer, then every task, in this process."""
+
+    def __init__(self, max_workers, initializer=None, initargs=()):
+        initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def map(self, fn, items, chunksize=1):
+        return map(fn, items)
+
+def test_pool_workers_split_the_rate_limit_quota(monkeypatch, process_limiter):
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", InlinePool)
+    scenarios = batch.make_scenarios(2, steps=1, llm_options={"latency": 0, "jitter": 0})
+    rows = batch.run_batch(scenarios, workers=4)
+    assert [row["status"] for row in rows] == ["ok", "ok"]
+    limiter = rate_limiter.get_rate_limiter()
+    assert limiter.requests.capacity == pytest.approx(REQUESTS_PER_MINUTE / 4)
+    assert limiter.tokens.capacity == pytest.approx(TOKENS_PER_MINUTE / 4)
+
+def test_a_single_worker_keeps_the_full_quota(process_limiter):
+    rows = batch.run_batch(batch.make_scenarios(1, steps=1, llm_options={"latency": 0, "jitter": 0}), workers=1)
+    assert rows[0]["status"] == "ok"
+    assert rate_limiter.get_rate_limiter().requests.capacity == REQUESTS_PER_MINUTE
\ No newline at end of file
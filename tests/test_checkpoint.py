@@ -0,0 +1,56 @@
+import os
+import pytest
+from src.checkpoint import (CheckpointError, checkpoint_path, fork_state, load_checkpoint, mission_lock, mission_running, save_checkpoint,
+                            unfinished_missions, LOCK_NAME)
+
+def agent_messages(chat_log):
+    return [(entry["sender"], entry["message"]) for entry in chat_log if not entry["message"].startswith("Resuming")]
+
+def test_resumed_mission_matches_uninterrupted_run(tmp_path, run_mission):
+    full_log, full_stats = run_mission(seed=1, checkpoint_dir=str(tmp_path))
+    resumed_log, resumed_stats = run_mission(resume_from=checkpoint_path(str(tmp_path), 2))
+    assert agent_messages(resumed_log) == agent_messages(full_log)
+    assert resumed_stats["rescued"] == full_stats["rescued"]
+    assert resumed_stats["tasks"] == full_stats["tasks"]
+
+def test_resume_keeps_a_larger_fleet(tmp_path, run_mission):
+    full_log, _ = run_mission(seed=2, checkpoint_dir=str(tmp_path), fleet_sizes={"rescue": 4, "drone": 3})
+    for step in (1, 2, 3):
+        resumed_log, _ = run_mission(resume_from=checkpoint_path(str(tmp_path), step))
+        assert agent_messages(resumed_log) == agent_messages(full_log)
+
+def test_forks_replay_the_rest_with_their_own_seed(tmp_path, run_mission):
+    run_mission(seed=1, checkpoint_dir=str(tmp_path), disaster_type="wildfire", steps=6)
+    state = load_checkpoint(checkpoint_path(str(tmp_path), 1))
+    logs = [agent_messages(run_mission(resume_from=fork_state(state, seed))[0]) for seed in (10, 10, 11)]
+    assert logs[0] == logs[1]
+    assert logs[0] != logs[2]
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-checkpoint.ckpt"
+    path.write_bytes(b"hello world")
+    with pytest.raises(CheckpointError):
+        load_checkpoint(str(path))
+
+def test_unfinished_missions_skip_finished_and_running_ones(tmp_path, run_mission):
+    root = str(tmp_path)
+    run_mission(seed=1, steps=2, checkpoint_dir=os.path.join(root, "finished"))
+    for name in ("stopped", "running"):
+        directory = os.path.join(root, name)
+        run_mission(seed=1, steps=2, checkpoint_dir=directory)
+        os.remove(checkpoint_path(directory, 2))
+        # Roll the manifest back to step 1, as if the mission had stopped there
+        save_checkpoint(load_checkpoint(checkpoint_path(directory, 1)), checkpoint_path(directory, 1))
+    with mission_lock(os.path.join(root, "running")):
+        missions = unfinished_missions(root)
+        with pytest.raises(CheckpointError):
+            with mission_lock(os.path.join(root, "running")):
+                pass
+    assert [(os.path.basename(directory), manifest["step"]) for directory, _, manifest in missions] == [("stopped", 1)]
+    assert not mission_running(os.path.join(root, "running"))
+
+def test_lock_left_by_a_dead_process_is_taken_over(tmp_path):
+    (tmp_path / LOCK_NAME).write_text("999999999")
+    assert not mission_running(str(tmp_path))
+    with mission_lock(str(tmp_path)):
+        assert mission_running(str(tmp_path))
\ No newline at end of file
@@ -0,0 +1,38 @@
+from src.events import apply_event, AgentFailed, AgentStarted, EventBus, EventChannel, MissionDone, SystemNotice, TokenReceived
+
+def test_full_channel_drops_tokens_and_evicts_oldest_without_blocking():
+    channel = EventChannel(maxsize=3)
+    for _ in range(5):
+        channel.publish(TokenReceived("Drone-1", 1, "x"))
+    for message in ("a", "b", "c"):
+        channel.publish(SystemNotice(message))
+    channel.publish(MissionDone("ok", "flood"))
+    assert channel.drain() == [SystemNotice("b"), SystemNotice("c"), MissionDone("ok", "flood")]
+    assert channel.dropped == 6
+
+def test_bus_unsubscribes_abandoned_channels():
+    bus = EventBus()
+    channel = bus.subscribe("mission", maxsize=2)
+    bus.publish("mission", SystemNotice("a"))
+    bus.publish("mission", SystemNotice("b"))
+    channel.last_read -= 3600
+    bus.publish("mission", SystemNotice("c"))
+    assert channel.closed
+    assert bus.missions() == []
+
+def test_bus_keeps_channels_that_are_read():
+    bus = EventBus()
+    channel = bus.subscribe("mission", maxsize=2)
+    for message in ("a", "b", "c"):
+        bus.publish("mission", SystemNotice(message))
+    assert not channel.closed
+    assert channel.drain() == [SystemNotice("b"), SystemNotice("c")]
+
+def test_failed_stream_settles_its_chat_entry_and_status():
+    chat_log, agent_status, flowchart = [], {}, []
+    for event in (AgentStarted("Rescue-1", "Rescue at (3, 4)", 7), TokenReceived("Rescue-1", 7, "Heading"),
+                  AgentFailed("Rescue-1", "Rescue-1 task failed: timeout", 7)):
+        apply_event(event, chat_log, agent_status, flowchart)
+    assert chat_log[0] == {"sender": "Rescue-1", "message": "Heading", "streaming": False, "id": 7}
+    assert chat_log[1]["message"] == "Rescue-1 task failed: timeout"
+    assert not agent_status["Rescue-1"]["active"]
\ No newline at end of file
@@ -0,0 +1,57 @@
+from collections import Counter
+import numpy as np
+import pytest
+from src import simulation
+from src.fleet import ACTIVE, INACTIVE, STANDBY, Fleet
+
+class Unit:
+    def __init__(self, name):
+        self.name = name
+
+    def attach(self, fleet, slot):
+        self.slot = slot
+
+def make_fleet(roles, standby=()):
+    return Fleet([Unit(f"{role}-{slot}") for slot, role in enumerate(roles)], roles, standby)
+
+def test_available_skips_down_and_flat_agents():
+    fleet = make_fleet(["controller", "rescue", "rescue", "rescue", "rescue"], standby=[4])
+    fleet.status[1] = INACTIVE
+    fleet.battery[2] = 0
+    assert fleet.available("rescue").tolist() == [3]
+    assert fleet.available("medical").tolist() == []
+
+def test_assign_gives_each_location_its_nearest_free_agent():
+    fleet = make_fleet(["controller", "rescue", "rescue", "rescue"])
+    fleet.location[1:] = [(0, 0), (5, 5), (9, 9)]
+    assert fleet.assign([1, 2, 3], [(8, 8), (4, 4), (9, 9), (0, 0)]) == [3, 2, 1]
+
+def test_promote_standby_refills_each_role_to_its_size():
+    fleet = make_fleet(["controller", "rescue", "rescue", "rescue", "drone"], standby=[2, 3])
+    assert fleet.sizes == {"controller": 1, "rescue": 1, "drone": 1}
+    fleet.status[[1, 4]] = INACTIVE
+    assert [agent.name for agent in fleet.promote_standby()] == ["rescue-2"]
+    assert fleet.status.tolist() == [ACTIVE, INACTIVE, ACTIVE, STANDBY, INACTIVE]
+
+def test_discharge_takes_flat_agents_down():
+    fleet = make_fleet(["controller", "rescue", "rescue"])
+    fleet.battery[2] = 3
+    depleted = fleet.discharge([1, 2], 5, 5, np.random.default_rng(0))
+    assert depleted.tolist() == [2]
+    assert fleet.battery.tolist() == [100, 95, 0]
+    assert fleet.status[2] == INACTIVE
+
+@pytest.mark.parametrize("size", [3, 10])
+def test_no_victim_is_dispatched_twice(monkeypatch, run_mission, size):
+    dispatched = Counter()
+    real_task_for = simulation.task_for
+
+    def task_for(agent, message, env, planner):
+        if message.topic in ("victim", "casualty"):
+            dispatched[message.topic, message.target] += 1
+        return real_task_for(agent, message, env, planner)
+
+    monkeypatch.setattr(simulation, "task_for", task_for)
+    run_mission(seed=3, steps=6, fleet_sizes={"rescue": size, "drone": size, "medical": size})
+    assert dispatched
+    assert max(dispatched.values()) == 1
\ No newline at end of file
@@ -0,0 +1,47 @@
+import httpx
+import pytest
+from groq import BadRequestError, RateLimitError
+from langchain_core.messages import HumanMessage
+from src import groq_llm
+from src.groq_llm import GroqLLM
+from src.rate_limiter import RateLimiter
+from src.resilience import get_circuit_breaker
+
+class FakeCompletions:
+    def __init__(self, error):
+        self.error = error
+        self.models = []
+        self.with_raw_response = self
+
+    def create(self, model, **kwargs):
+        self.models.append(model)
+        raise self.error
+
+def status_error(cls, status_code, headers=None):
+    response = httpx.Response(status_code, headers=headers, request=httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions"))
+    return cls(f"HTTP {status_code}", response=response, body=None)
+
+def make_llm(monkeypatch, model, error, fallback_model=None):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(groq_llm, "LLM_CACHE_ENABLED", False)
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=6000, min_interval=0)
+    llm = GroqLLM(model, fallback_model=fallback_model, rate_limiter=limiter)
+    completions = FakeCompletions(error)
+    llm.client = type("FakeClient", (), {"chat": type("FakeChat", (), {"completions": completions})})()
+    return llm, completions, limiter
+
+def test_client_errors_neither_trip_the_breaker_nor_fall_back(monkeypatch):
+    llm, completions, _ = make_llm(monkeypatch, "test-bad-request", status_error(BadRequestError, 400), fallback_model="test-bad-request-fallback")
+    for _ in range(5):
+        with pytest.raises(BadRequestError):
+            llm([HumanMessage(content="hello")], max_tokens=10)
+    assert completions.models == ["test-bad-request"] * 5
+    assert get_circuit_breaker("test-bad-request").state == "closed"
+
+def test_rate_limit_retries_refund_their_reservation(monkeypatch):
+    llm, completions, limiter = make_llm(monkeypatch, "test-rate-limited", status_error(RateLimitError, 429, {"retry-after": "0.01"}))
+    with pytest.raises(RateLimitError):
+        llm([HumanMessage(content="hello")], max_tokens=1000)
+    assert len(completions.models) == groq_llm.RATE_LIMIT_RETRIES + 1
+    # Four unrefunded attempts would have taken over 4000 of the 6000 tokens
+    assert limiter.tokens.level > 5900
\ No newline at end of file
@@ -0,0 +1,45 @@
+from src.messaging import Message, MessageRouter
+
+def test_topic_messages_reach_every_subscriber_but_the_sender():
+    router = MessageRouter()
+    for name in ("Controller", "Drone-1", "Rescue-1"):
+        router.register(name, () if name == "Controller" else ("plan",))
+    router.register("Rescue-2", ("plan",))
+    assert router.send(Message("Rescue-1", "Go", topic="plan")) == 2
+    assert router.pop("Drone-1").body == "Go"
+    assert router.pop("Rescue-1") is None
+
+def test_direct_messages_go_to_one_inbox():
+    router = MessageRouter()
+    router.register("Rescue-1")
+    router.register("Medical-1")
+    router.send(Message("Controller", "Hold", recipient="Medical-1"))
+    assert router.pending("Medical-1") == 1
+    assert router.pending("Rescue-1") == 0
+    assert router.send(Message("Controller", "Hello", recipient="Nobody")) == 0
+
+def test_full_inbox_drops_the_oldest_message():
+    router = MessageRouter(inbox_size=2)
+    router.register("Rescue-1", ("victim",))
+    for x in range(3):
+        router.send(Message("Drone-1", f"Victim {x}", topic="victim", target=(x, 0)))
+    assert router.dropped == 1
+    assert [router.pop("Rescue-1").target for _ in range(2)] == [(1, 0), (2, 0)]
+
+def test_take_skips_stale_work_up_to_the_limit():
+    router = MessageRouter()
+    router.register("rescue", ("victim",))
+    for x in range(5):
+        router.send(Message("Drone-1", "Victim", topic="victim", target=(x, 0)))
+    taken = router.take("rescue", 2, is_stale=lambda message: message.target[0] % 2 == 0)
+    assert [message.target for message in taken] == [(1, 0), (3, 0)]
+    assert router.pending("rescue") == 1
+
+def test_snapshot_round_trip_keeps_inboxes_and_subscriptions():
+    router = MessageRouter()
+    router.register("rescue", ("victim",), inbox_size=7)
+    router.send(Message("Drone-1", "Victim", topic="victim", target=(1, 2), step=3))
+    restored = MessageRouter.from_snapshot(router.snapshot())
+    assert restored.pop("rescue") == Message("Drone-1", "Victim", topic="victim", target=(1, 2), step=3)
+    assert restored.send(Message("Drone-1", "Victim", topic="victim")) == 1
+    assert restored.sent == 2
\ No newline at end of file
@@ -0,0 +1,27 @@
+import pytest
+from src.prompts import split_replies
+
+NAMES = ["Drone-1", "Drone-10"]
+
+@pytest.mark.parametrize("response", [
+    "Drone-1: go north\nDrone-10: hold position",
+    "**Drone-1:** go north\n**Drone-10:** hold position",
+    "**Drone-1**: go north\n**Drone-10**: hold position",
+    "__Drone-1:__ go north\n__Drone-10:__ hold position",
+    "- Drone-1: go north\n- Drone-10: hold position",
+    "* **Drone-1:** go north\n* **Drone-10:** hold position",
+    "1. Drone-1: go north\n2. Drone-10: hold position",
+    "1) **Drone-1**: go north\n2) **Drone-10**: hold position",
+    "### Drone-1:\ngo north\n### Drone-10:\nhold position",
+    "Briefing follows.\n\nDrone-1 : go north\n\nDrone-10 : hold position\n",
+])
+def test_split_replies_reads_common_markdown_formats(response):
+    assert split_replies(response, NAMES) == {"Drone-1": "go north", "Drone-10": "hold position"}
+
+def test_units_the_reply_never_names_get_all_of_it():
+    response = "Everyone hold position."
+    assert split_replies(response, NAMES) == {"Drone-1": response, "Drone-10": response}
+
+def test_names_mentioned_mid_line_do_not_split_the_reply():
+    replies = split_replies("Drone-1: cover the east side, Drone-10: is already there\nDrone-10: hold", NAMES)
+    assert replies == {"Drone-1": "cover the east side, Drone-10: is already there", "Drone-10": "hold"}
\ No newline at end of file
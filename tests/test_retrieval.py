@@ -0,0 +1,23 @@
+import numpy as np
+from src.knowledge_base import KnowledgeBase
+from src.retrieval import MissionRetriever
+
+def record(knowledge_base, disaster_type, responses):
+    knowledge_base.record_run({"disaster_type": disaster_type}, [(1, agent, message) for agent, message in responses])
+
+def test_refresh_drops_rows_a_crashed_refresh_left_behind(tmp_path):
+    knowledge_base = KnowledgeBase(str(tmp_path / "kb.sqlite"), legacy_csv=None)
+    record(knowledge_base, "flood", [("Rescue-1", "Boats evacuated the flooded school"), ("Medical-1", "Treated hypothermia at the shelter")])
+    retriever = MissionRetriever(knowledge_base, index_dir=str(tmp_path / "index"))
+    assert retriever.refresh() == 2
+    # A refresh that crashed after appending data but before writing its header
+    with open(retriever.vectors_path, "ab") as f:
+        np.ones((3, retriever.header["dimensions"]), dtype=np.float32).tofile(f)
+    with open(retriever.rows_path, "ab") as f:
+        f.write(b"\xff" * 5)
+
+    record(knowledge_base, "wildfire", [("Drone-1", "Smoke plume spotted over the ridge line")])
+    retriever = MissionRetriever(knowledge_base, index_dir=str(tmp_path / "index"))
+    hits = retriever.search("smoke plume over the ridge", k=1, min_score=0)
+    assert [(hit["agent"], hit["disaster_type"]) for hit in hits] == [("Drone-1", "wildfire")]
+    assert [hit["agent"] for hit in retriever.search("boats flooded school", k=1, min_score=0)] == ["Rescue-1"]
\ No newline at end of file
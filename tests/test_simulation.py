@@ -0,0 +1,81 @@
+from src import simulation
+from src.agents import DisasterResponseAgent, get_fleet
+from src.messaging import Message
+from src.mock_llm import MockLLM
+
+def test_an_inactive_controller_broadcasts_no_plan(monkeypatch, run_mission):
+    published = []
+    real_get_fleet = simulation.get_fleet
+
+    def get_fleet(*args, **kwargs):
+        fleet = real_get_fleet(*args, **kwargs)
+        fleet.controller.status = "inactive"
+        real_publish = fleet.controller.publish
+        fleet.controller.publish = lambda topic, *rest, **options: published.append(topic) or real_publish(topic, *rest, **options)
+        return fleet
+
+    monkeypatch.setattr(simulation, "get_fleet", get_fleet)
+    run_mission(seed=1, steps=2)
+    assert published
+    assert "plan" not in published
+
+def rescue_batch(size):
+    fleet = get_fleet({"rescue": size}, standby={}, llm=MockLLM(latency=0, jitter=0, seed=0), retrieval=False)
+    members = fleet.members("rescue")
+    jobs = [(agent, Message("Drone-1", "Victim", topic="victim", target=(x, x)), f"Rescue at {(x, x)}", f"Rescue at {(x, x)}.", (x, x))
+            for x, agent in enumerate(members)]
+    return members, jobs
+
+def test_the_next_member_leads_when_the_lead_runs_flat():
+    members, jobs = rescue_batch(3)
+    members[0].battery = 1
+    events = []
+    responses = simulation.run_batch(jobs, "", events.append)
+    assert responses[0] is None
+    assert all(responses[1:])
+    assert [type(event).__name__ for event in events if event.agent == members[0].name] == ["AgentStarted", "AgentFailed"]
+    assert members[1].location == (1, 1) and members[2].location == (2, 2)
+
+def test_a_batch_with_no_charge_left_fails_every_job():
+    members, jobs = rescue_batch(2)
+    for agent in members:
+        agent.battery = 1
+    assert simulation.run_batch(jobs, "", lambda event: None) == [None, None]
+
+def test_a_failed_rescue_is_dispatched_again(monkeypatch, run_mission):
+    dispatched, failed, envs = [], [], []
+    real_task_for, real_perform_task = simulation.task_for, DisasterResponseAgent.perform_task
+    real_environment = simulation.DisasterEnvironment
+
+    def task_for(agent, message, env, planner):
+        if message.topic == "victim":
+            dispatched.append(message.target)
+        return real_task_for(agent, message, env, planner)
+
+    def perform_task(agent, task, on_token=None):
+        if agent.name.startswith("Rescue") and not failed:
+            failed.append(dispatched[-1])
+            raise RuntimeError("rescue call failed")
+        return real_perform_task(agent, task, on_token)
+
+    def environment(*args, **kwargs):
+        envs.append(real_environment(*args, **kwargs))
+        return envs[-1]
+
+    monkeypatch.setattr(simulation, "task_for", task_for)
+    monkeypatch.setattr(DisasterResponseAgent, "perform_task", perform_task)
+    monkeypatch.setattr(simulation, "DisasterEnvironment", environment)
+    run_mission(seed=2, steps=10, fleet_sizes={"rescue": 3})
+    assert failed
+    assert dispatched.count(failed[0]) == 2
+    assert envs[0].rescued[failed[0]]
+
+def test_members_that_run_flat_are_reported_failed_and_stay_put():
+    members, jobs = rescue_batch(3)
+    members[2].battery = 1
+    events = []
+    responses = simulation.run_batch(jobs, "", events.append)
+    assert all(responses[:2])
+    assert responses[2] is None
+    assert [type(event).__name__ for event in events if event.agent == members[2].name] == ["AgentStarted", "AgentFailed"]
+    assert members[2].location != (2, 2)
\ No newline at end of file
@@ -1,11 +1,17 @@
 import streamlit as st
 import streamlit.components.v1 as components
 from src.simulation import run_disaster_simulation
+from src.events import event_bus, apply_event, MissionDone
+from src.knowledge_base import get_knowledge_base, responses_from_chat_log
+from src.instrumentation import tracer, LLM_PHASES
+from src.checkpoint import unfinished_missions, load_checkpoint
+from src.retrieval import agent_role
+from config.settings import UI_REFRESH_SECONDS, CHAT_PAGE_SIZE, FLOWCHART_WINDOW, UI_MAX_EVENTS_PER_REFRESH, CHECKPOINT_DIR
+from functools import lru_cache
 import threading
-import time
-import queue
-import csv
-from datetime import datetime
+import os
+import math
+import uuid
 
 AGENT_COLORS = {
     "Controller": "#FFB6A3", "Routes-1": "#A3E8EB", "Drone-1": "#FFEBA3", "Drone-2": "#FFDAA3",
@@ -13,18 +19,19 @@ AGENT_COLORS = {
     "Medical-1": "#D6FFB6", "System": "#CCCCCC"
 }
 
-# Use a queue to communicate between threads
-result_queue = queue.Queue()
+@lru_cache(maxsize=1024)  # Looked up for every flowchart box and chat bubble on each redraw
+def agent_color(name):
+    """Larger fleets share their role's first colour, e.g. Rescue-7 is drawn like Rescue-1."""
+    return AGENT_COLORS.get(name) or AGENT_COLORS.get(f"{agent_role(name)}-1", "#FFFFFF")
 
-def run_simulation_in_background(chat_log, agent_status, flowchart):
-    result, disaster_type = run_disaster_simulation(steps=3, ui_mode=True, chat_log=chat_log, agent_status=agent_status, flowchart=flowchart)
-    result_queue.put((result, disaster_type))
-
-def draw_flowchart(flowchart):
-    if not flowchart:
-        return "<p>No actions yet.</p>"
+def run_simulation_in_background(publisher, checkpoint_dir, resume_from=None):
+    # The worker never touches session state; everything reaches the UI as events on this mission's channel
+    try:
+        run_disaster_simulation(ui_mode=True, events=publisher, checkpoint_dir=checkpoint_dir, resume_from=resume_from)
+    except Exception as e:
+        publisher.publish(MissionDone(f"Simulation failed: {e}", "Unknown", failed=True))
 
-    html = """
+FLOWCHART_CSS = """
     <style>
         .flowchart { 
             display: flex; 
@@ -62,21 +69,59 @@ def draw_flowchart(flowchart):
             word-wrap: break-word; 
         }
     </style>
-    <div class='flowchart'>
-    """
-    for i, (from_agent, to_agent, action, completed) in enumerate(flowchart):
-        color = AGENT_COLORS.get(from_agent, "#FFFFFF")
-        status_class = "completed" if completed else "incomplete"
-        html += f"""
+"""
+
+def render_flowchart_box(from_agent, action, completed):
+    color = agent_color(from_agent)
+    status_class = "completed" if completed else "incomplete"
+    return f"""
         <div class='agent-box {status_class}' style='background-color: {color}; color: black;'>
             <strong>{from_agent}</strong>
             <div class='task-text'>{action}</div>
         </div>
         """
-        if i < len(flowchart) - 1:
-            html += "<span class='arrow'>→</span>"
-    html += "</div>"
-    return html
+
+def draw_flowchart(flowchart, cache=None, window=FLOWCHART_WINDOW):
+    """Flowchart HTML for the last window actions, so its size stays flat however long the mission runs.
+    Pass the same list as cache across calls to only render boxes added since the last call."""
+    if not flowchart:
+        return "<p>No actions yet.</p>"
+    if cache is None:
+        cache = []
+    for from_agent, to_agent, action, completed in flowchart[len(cache):]:
+        cache.append(render_flowchart_box(from_agent, action, completed))
+    earlier = max(len(cache) - window, 0)
+    note = f"<p style='color: #888;'>{earlier} earlier actions not shown</p>" if earlier else ""
+    return FLOWCHART_CSS + note + "<div class='flowchart'>" + "<span class='arrow'>→</span>".join(cache[earlier:]) + "</div>"
+
+def render_chat_entry(entry):
+    color = agent_color(entry["sender"])
+    return f"<div style='background-color: {color}; padding: 8px; border-radius: 5px; margin: 5px; color: black;'><b>{entry['sender']}:</b> {entry['message']}</div>"
+
+def reset_render_cache():
+    st.session_state.chat_html = []
+    st.session_state.chat_cursor = 0
+    st.session_state.flowchart_html = []
+    st.session_state.flowchart_page = (0, "")
+    st.session_state.disaster_alert = None
+    st.session_state.simulation_complete = False
+
+def update_render_cache(chat_log):
+    """Render only chat entries past the cursor; entries still streaming are re-rendered until they finish."""
+    chat_html = st.session_state.chat_html
+    cursor = st.session_state.chat_cursor
+    del chat_html[cursor:]
+    for entry in chat_log[cursor:]:
+        chat_html.append(render_chat_entry(entry))
+        if entry["sender"] == "System":
+            if "Simulation complete" in entry["message"]:
+                st.session_state.simulation_complete = True
+            elif "Disaster Type" in entry["message"]:
+                st.session_state.disaster_alert = entry["message"]
+    # Advance past the settled prefix only
+    while cursor < len(chat_html) and not chat_log[cursor].get("streaming"):
+        cursor += 1
+    st.session_state.chat_cursor = cursor
 
 def display_chat():
     st.set_page_config(page_title="Response Monitor", layout="wide")
@@ -91,11 +136,10 @@ def display_chat():
         st.session_state.simulation_result = ""
         st.session_state.disaster_type = "Unknown"
         st.session_state.button_clicked = False
-
-    # Local references to session state
-    chat_log = st.session_state.chat_log
-    agent_status = st.session_state.agent_status
-    flowchart = st.session_state.flowchart
+        st.session_state.mission_id = None
+        st.session_state.event_channel = None
+        st.session_state.trace_id = None
+        reset_render_cache()
 
     # Start button with full reset logic
     if st.button("🚀 Start Mission", key="start", help="Click here to start disaster simulation!") and not st.session_state.simulation_running:
@@ -103,29 +147,78 @@ def display_chat():
         st.session_state.chat_log = []
         st.session_state.agent_status = {agent: {"active": False, "message": "", "battery": 100, "task": "", "completed": False} for agent in AGENT_COLORS.keys()}
         st.session_state.flowchart = []
-        st.session_state.simulation_result = ""
-        st.session_state.disaster_type = "Unknown"
-        
-        # Update local references after reset
-        chat_log = st.session_state.chat_log
-        agent_status = st.session_state.agent_status
-        flowchart = st.session_state.flowchart
-
-        # Start the simulation
-        st.session_state.simulation_running = True
-        thread = threading.Thread(target=run_simulation_in_background, args=(chat_log, agent_status, flowchart))
-        thread.start()
-
-    # Check if the simulation has completed
-    try:
-        result, disaster_type = result_queue.get_nowait()
-        st.session_state.simulation_result = result
-        st.session_state.disaster_type = disaster_type
-        st.session_state.simulation_running = False  # Reset the flag
-        # Append to knowledge base after simulation completes
-        append_to_knowledge_base(chat_log, disaster_type)
-    except queue.Empty:
-        pass
+        start_mission(uuid.uuid4().hex)
+
+    # Missions cut short (crash, restart, closed tab) can carry on from their last completed step
+    if not st.session_state.simulation_running:
+        unfinished = unfinished_missions()
+        if unfinished:
+            directory, path, manifest = unfinished[0]
+            label = f"⏯️ Resume Mission ({manifest['disaster_type']}, step {manifest['step']}/{manifest['steps']})"
+            if st.button(label, key="resume", help="Continue the most recent unfinished mission from its last checkpoint"):
+                state = load_checkpoint(path)
+                st.session_state.chat_log = [dict(entry) for entry in state["chat_log"]]
+                st.session_state.agent_status = {name: dict(status) for name, status in state["agent_status"].items()}
+                st.session_state.flowchart = list(state["flowchart"])
+                start_mission(os.path.basename(directory), resume_from=state)
+
+    # Aggregates only change when a mission finishes, so they stay outside the refreshing fragment
+    render_mission_history()
+    render_performance_summary()
+
+    # Only the live panels refresh on a timer, instead of rerunning the whole script every second
+    live_panels = st.fragment(render_live_panels, run_every=UI_REFRESH_SECONDS if st.session_state.simulation_running else None)
+    live_panels()
+
+def start_mission(mission_id, resume_from=None):
+    st.session_state.simulation_result = ""
+    st.session_state.disaster_type = "Unknown"
+    st.session_state.trace_id = None
+    reset_render_cache()
+
+    # Each mission gets its own channel on the bus, so concurrent sessions never see each other's events
+    st.session_state.mission_id = mission_id
+    st.session_state.event_channel = event_bus.subscribe(mission_id)
+
+    # Start the simulation; checkpoints go under the mission id so a resumed mission keeps writing to the same place
+    st.session_state.simulation_running = True
+    checkpoint_dir = os.path.join(CHECKPOINT_DIR, mission_id)
+    thread = threading.Thread(target=run_simulation_in_background, args=(event_bus.publisher(mission_id), checkpoint_dir, resume_from))
+    thread.start()
+
+def render_live_panels():
+    chat_log = st.session_state.chat_log
+    agent_status = st.session_state.agent_status
+    flowchart = st.session_state.flowchart
+    finished_now = False
+
+    # Apply this session's pending events in one batch
+    channel = st.session_state.event_channel
+    if channel is not None:
+        events = channel.drain(UI_MAX_EVENTS_PER_REFRESH)
+        for event in events:
+            apply_event(event, chat_log, agent_status, flowchart)
+            if isinstance(event, MissionDone):
+                st.session_state.simulation_result = event.result
+                st.session_state.disaster_type = event.disaster_type
+                st.session_state.trace_id = event.stats.get("trace_id")
+                st.session_state.simulation_running = False  # Reset the flag
+                event_bus.unsubscribe(st.session_state.mission_id, channel)
+                st.session_state.event_channel = None
+                # Append to knowledge base after simulation completes
+                if not event.failed:
+                    append_to_knowledge_base(chat_log, event.disaster_type, event.stats)
+                finished_now = True
+                break
+        else:
+            if channel.closed and len(events) < UI_MAX_EVENTS_PER_REFRESH:
+                # The bus dropped this session while it wasn't reading; the mission itself carries on
+                st.session_state.simulation_result = "Lost live updates from the mission; it keeps running in the background."
+                st.session_state.simulation_running = False
+                st.session_state.event_channel = None
+                finished_now = True
+
+    update_render_cache(chat_log)
 
     # Three-column layout
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -133,7 +226,7 @@ def display_chat():
     with col1:
         st.subheader("Agent Status")
         for agent, status in agent_status.items():
-            color = AGENT_COLORS.get(agent, "#FFFFFF")
+            color = agent_color(agent)
             battery = status["battery"]
             active = "Active" if status["active"] else "Inactive"
             task = status["task"] if status["task"] else "No task"
@@ -142,22 +235,19 @@ def display_chat():
 
     with col2:
         st.subheader("Mission Flow")
-        flowchart_html = draw_flowchart(flowchart)
+        # Rebuilt only when actions were added; the same HTML again leaves the frontend's iframe untouched
+        drawn, flowchart_html = st.session_state.flowchart_page
+        if drawn != len(flowchart) or not flowchart_html:
+            flowchart_html = draw_flowchart(flowchart, cache=st.session_state.flowchart_html)
+            st.session_state.flowchart_page = (len(flowchart), flowchart_html)
         components.html(flowchart_html, height=300, scrolling=True)
         if st.session_state.simulation_result:
             st.success(st.session_state.simulation_result)
 
     with col3:
-        disaster_alert = None
-        simulation_complete = False
-        resolved_agents = []
-        for entry in chat_log:
-            if entry["sender"] == "System":
-                if "Simulation complete" in entry["message"]:
-                    simulation_complete = True
-                    resolved_agents = ["Medical Team", "Fire Department"]  # Parse this if needed
-                elif "Disaster Type" in entry["message"]:
-                    disaster_alert = entry["message"]
+        disaster_alert = st.session_state.disaster_alert
+        simulation_complete = st.session_state.simulation_complete
+        resolved_agents = ["Medical Team", "Fire Department"] if simulation_complete else []  # Parse this if needed
 
         if disaster_alert:
             st.markdown(
@@ -198,47 +288,63 @@ def display_chat():
             )
 
         with st.expander("Detailed Chat Log", expanded=True):
-            for entry in chat_log:
-                sender = entry["sender"]
-                message = entry["message"]
-                color = AGENT_COLORS.get(sender, "#FFFFFF")
-                st.markdown(f"<div style='background-color: {color}; padding: 8px; border-radius: 5px; margin: 5px; color: black;'><b>{sender}:</b> {message}</div>", unsafe_allow_html=True)
-
-    # Auto-refresh while simulation is running
-    if st.session_state.simulation_running:
-        time.sleep(1)
+            # One markdown block per page of cached entries rather than one element per message
+            chat_html = st.session_state.chat_html
+            pages = max(1, math.ceil(len(chat_html) / CHAT_PAGE_SIZE))
+            page = pages
+            if pages > 1:
+                page -= st.number_input("Pages back", min_value=0, max_value=pages - 1, value=0, step=1, key="chat_pages_back")
+            start = (page - 1) * CHAT_PAGE_SIZE
+            st.markdown("".join(chat_html[start:start + CHAT_PAGE_SIZE]), unsafe_allow_html=True)
+
+    # A full rerun drops the periodic refresh once the mission is over
+    if finished_now:
         st.rerun()
 
-def append_to_knowledge_base(chat_log, disaster_type):
-    """Append disaster data to a CSV knowledge base."""
-    # Extract data from chat log
-    disaster_info = None
-    routes_optimized = "N/A"
+def append_to_knowledge_base(chat_log, disaster_type, stats=None):
+    """Record the finished mission and its agent responses in the knowledge base."""
+    stats = dict(stats or {})
+    latencies = stats.pop("step_latency", None)
+    if latencies:
+        stats["mean_step_latency"] = sum(latencies) / len(latencies)
+    # Affected area count as announced at mission start, e.g. "Disaster Type: earthquake | Affected Areas: 8"
     for entry in chat_log:
         if entry["sender"] == "System" and "Disaster Type" in entry["message"]:
-            disaster_info = entry["message"]  # e.g., "Disaster Type: earthquake | Affected Areas: 8"
-        if entry["sender"] == "Routes-1":
-            routes_optimized = entry["message"]  # e.g., response about cleared routes
-
-    if disaster_info:
-        # Parse disaster type and affected areas
-        parts = disaster_info.split(" | ")
-        disaster_type = parts[0].replace("Disaster Type: ", "").strip()
-        affected_areas = parts[1].replace("Affected Areas: ", "").strip()
-
-        # Get current timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # Define CSV file and headers
-        csv_file = "disaster_knowledge_base.csv"
-        headers = ["Timestamp", "Disaster Type", "Affected Areas"]
-
-        # Append data to CSV
-        with open(csv_file, mode="a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            # Write header if file is new/empty
-            if f.tell() == 0:
-                writer.writerow(headers)
-            writer.writerow([timestamp, disaster_type, affected_areas])
+            stats["affected_areas"] = int(entry["message"].split(" | ")[1].replace("Affected Areas: ", "").strip())
+            break
+    stats["disaster_type"] = disaster_type
+    stats["status"] = "ok"
+    get_knowledge_base().record_run(stats, responses_from_chat_log(chat_log), source="ui")
+
+def render_mission_history():
+    history = get_knowledge_base().aggregate_by_type()
+    if not history:
+        return
+    with st.expander("Mission History", expanded=False):
+        for row in history:
+            rescued = f"{row['avg_rescued']:.1f}" if row["avg_rescued"] is not None else "n/a"
+            st.markdown(f"**{row['disaster_type']}**: {row['runs']} runs | avg affected {row['avg_affected'] or 0:.1f} | avg rescued {rescued} | last {row['last_run']}")
+
+def render_performance_summary():
+    """Where the last mission's time went, from its trace spans."""
+    if st.session_state.trace_id is None:
+        return
+    summary = tracer.summary(st.session_state.trace_id)
+    if not summary["spans"]:
+        return
+    with st.expander("Performance", expanded=False):
+        spans, llm = summary["spans"], summary["llm"]
+        mission = spans.get("mission", {}).get("total", 0.0)
+        throttle = spans.get("throttle", {}).get("total", 0.0)
+        cols = st.columns(4)
+        cols[0].metric("Mission", f"{mission:.1f}s")
+        cols[1].metric("Step delay", f"{throttle:.1f}s")
+        cols[2].metric("LLM calls", llm["calls"], f"{llm['cache_hits']} cached", delta_color="off")
+        cols[3].metric("Tokens", f"{llm['prompt_tokens'] + llm['completion_tokens']:,}", f"${llm['cost']:.4f}", delta_color="off")
+        st.markdown("**LLM time** — " + " | ".join(f"{phase}: {llm[phase]:.2f}s" for phase in LLM_PHASES)
+                    + f" | prompt tokens {llm['prompt_tokens']:,}, completion tokens {llm['completion_tokens']:,}, {llm['retries']} rate-limit retries")
+        slowest = sorted(summary["agents"].items(), key=lambda item: -item[1]["seconds"])
+        st.markdown("**Agent time** — " + " | ".join(f"{agent}: {totals['seconds']:.1f}s over {totals['tasks']} tasks" for agent, totals in slowest))
+
 if __name__ == "__main__":
     display_chat()
\ No newline at end of file